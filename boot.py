@@ -21,6 +21,8 @@ except:
     class SimpleLogger:
         def log(self, component, message, severity="INFO", error=None):
             print(f"{component}: {message}")
+        def flush(self):
+            pass
     boot_logger = SimpleLogger()
     
     def feed_watchdog():
@@ -94,7 +96,7 @@ def sync_time(wlan):
                 # Adjust for timezone if configured
                 if hasattr(config, 'TIMEZONE_OFFSET'):
                     # Adjust time for timezone
-                    timezone_offset = config.TIMEZONE_OFFSET * 3600  # Convert hours to seconds
+                    timezone_offset = int(config.TIMEZONE_OFFSET * 3600)  # Convert hours to seconds
                     current_time = time.time() + timezone_offset
                     tm = time.localtime(current_time)
                     machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
@@ -275,6 +277,10 @@ def main():
         # Keep LED on to indicate error
         led.on()
         return False
+    
+    finally:
+        # Write out buffered boot log entries before main.py starts
+        boot_logger.flush()
 
 # Run boot sequence
 if __name__ == "__main__":
@@ -1,27 +1,45 @@
 # config.py - Configuration settings for the Environmental Monitor
 
-# --- Generate and Display a Unique Device ID ---
-import machine
-import binascii
-
-# This creates a unique name like "Pico-E66181029AC37C4C"
-unique_id_bytes = machine.unique_id()
-unique_id_hex = binascii.hexlify(unique_id_bytes).decode('utf-8').upper()
-DEVICE_ID = f"{unique_id_hex}"
-
-# Bluetooth device name (if Bluetooth functionality is needed)
-BT_DEVICE_NAME = f"EnvMonitor-{unique_id_hex[-8:]}"  # Use last 8 chars of device ID
-
-# Print the generated ID to the console when the program starts
-print(f"[Config] System initialized with unique DEVICE_ID: {DEVICE_ID}")
-print(f"[Config] Bluetooth device name: {BT_DEVICE_NAME}")
+# --- Unique Device ID ---
+# Computed on first use rather than at import, so importing config for its
+# constants doesn't touch the hardware or print to the console.
+_DEVICE_ID = None
+
+def get_device_id():
+    """Get the unique device ID, e.g. "E66181029AC37C4C"
+    
+    Returns:
+        str: Hex encoded machine.unique_id()
+    """
+    global _DEVICE_ID
+    if _DEVICE_ID is None:
+        import machine
+        import binascii
+        _DEVICE_ID = binascii.hexlify(machine.unique_id()).decode('utf-8').upper()
+        if UPLOAD_DEBUG_MODE:
+            print(f"[Config] System initialized with unique DEVICE_ID: {_DEVICE_ID}")
+    return _DEVICE_ID
+
+def get_bt_name():
+    """Get the Bluetooth device name (if Bluetooth functionality is needed)
+    
+    Returns:
+        str: Name built from the last 8 characters of the device ID
+    """
+    return f"EnvMonitor-{get_device_id()[-8:]}"
 # -------------------------------------------------------------
 
 
 # This module contains all configurable parameters for the system.
 
-WIFI_SSID = 'SSID'
-WIFI_PASSWORD = 'PWD'
+# WiFi credentials are kept in secrets.py on the filesystem so this module
+# can be frozen into the firmware (see manifest.py) without a rebuild when
+# they change. The values below are only used if secrets.py is missing.
+try:
+    from secrets import WIFI_SSID, WIFI_PASSWORD
+except ImportError:
+    WIFI_SSID = 'SSID'
+    WIFI_PASSWORD = 'PWD'
 
 # Network connection settings
 WIFI_MAX_ATTEMPTS = 10            # Maximum number of connection attempts
@@ -59,7 +77,8 @@ I2C_FREQUENCY = 100000            # 100kHz
 SCD4X_I2C_ADDR = 0x62             # I2C address of SCD4X sensor
 SENSOR_ALTITUDE = 0               # Location altitude in meters
 SENSOR_PRESSURE = 1013            # Default pressure in hPa
-TEMP_OFFSET = 0                   # Temperature calibration offset in °C
+TEMP_OFFSET = 0                   # Temperature calibration offset in °C (may be fractional)
+SCD4X_DEBUG = False               # Print SCD4X driver diagnostics to the console
 
 # VEML7700 Ambient Light Sensor Settings
 VEML7700_I2C_ADDR = 0x10          # I2C address of VEML7700 sensor
@@ -107,7 +126,7 @@ MAX_RECOVERY_ATTEMPTS = 3         # Maximum recovery attempts before giving up
 # Memory management thresholds (simplified)
 MEMORY_WARNING_THRESHOLD = 75     # % memory usage that triggers warning
 MEMORY_CRITICAL_THRESHOLD = 85    # % memory usage for critical actions
-GC_COLLECT_INTERVAL = 60          # Seconds between forced garbage collections
+GC_THRESHOLD_DIVISOR = 4          # Collect after allocating 1/N of the free heap
 
 # Storage thresholds
 STORAGE_WARNING_THRESHOLD = 80    # % storage usage warning level
@@ -116,7 +135,7 @@ STORAGE_CRITICAL_THRESHOLD = 90   # % storage usage critical level
 # Logging settings
 LOG_INTERVAL = 15 * 60            # Seconds between data log entries (15 min) # <-- CHANGED
 LOG_DIRECTORY = '/logs'           # Directory for log storage
-SENSOR_LOG_FILE = 'sensor_log.txt'# Filename for sensor data log
+SENSOR_LOG_FILE = 'sensor_log.bin'# Filename for binary sensor data log
 NETWORK_LOG_FILE = 'network.log'  # Filename for network event log
 ERROR_LOG_FILE = 'error.log'      # Filename for error log
 MAX_LOG_SIZE = 1024 * 50          # Maximum log file size (50KB) to save space
@@ -128,15 +147,16 @@ CHART_HISTORY_POINTS = 50
 
 # Time Settings
 NTP_SERVER = 'time.google.com'    # Primary NTP server
-TIMEZONE_OFFSET = -5              # Hours from UTC (e.g., -5 for EST, 0 for GMT/UTC)
+TIMEZONE_OFFSET = -5              # Hours from UTC (e.g., -5 for EST, 5.5 for IST)
 NTP_SYNC_INTERVAL = 6 * 3600      # Sync time every 6 hours (in seconds)
 
 # Web server settings
 WEB_SERVER_PORT = 80              # Port for web server
-ALLOWED_ENDPOINTS = [             # Valid web server endpoints
+HTML_CACHE_FILE = 'dashboard.html'# Rendered dashboard page, served from flash
+ALLOWED_ENDPOINTS = frozenset((   # Valid web server endpoints (hashed lookup)
     '/', '/csv', '/json',
     '/logs/network.log', '/api/data', '/api/history', '/test.html', '/sensors'
-]
+))
 
 # Security settings
 MAX_REQUESTS_PER_MINUTE = 60      # Rate limit per IP address
@@ -146,8 +166,13 @@ WEBREPL_PASSWORD = "webrepl"      # Change this for security
 
 # Power management (disabled for stability)
 LOW_POWER_MODE_ENABLED = False     # Keep disabled for web server reliability
+# SLEEP_WHEN_IDLE lightsleeps between polls when no periodic task is due.
+# The web server isn't polled while asleep, so each sleep is capped at the
+# main loop's poll timeout (100 ms, up to 5 s while backing off after
+# errors) and a new HTTP connection can wait up to that much longer to be
+# accepted. Power saving is modest for the same reason.
 SLEEP_WHEN_IDLE = False            # Keep disabled
-SLEEP_DURATION = 1000             # Not used when disabled
+SLEEP_DURATION = 1000              # Longest single lightsleep (ms); not used when disabled
 
 # Hardware watchdog settings (disabled for development)
 WATCHDOG_ENABLED = False           # Keep disabled during development
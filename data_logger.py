@@ -1,8 +1,38 @@
 # data_logger.py - Logs sensor data to filesystem with memory optimizations
+import os
 import time
 import gc
+import struct
 import config
-from utils import CircularBuffer, ensure_directory, feed_watchdog, format_datetime
+from utils import ensure_directory, feed_watchdog, format_datetime, celsius_to_fahrenheit
+
+# Binary log record layout (little-endian, 16 bytes):
+#   epoch seconds, temp_c x10, co2 ppm, humidity x10, pressure hPa, lux x10
+# Temperature in Fahrenheit is derived from temp_c when records are loaded.
+RECORD_FORMAT = '<IhHHHI'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Records are buffered in RAM and written together to save flash wear.
+# Up to FLUSH_RECORDS - 1 entries (45 minutes at the default interval)
+# can be lost if the board resets before a flush.
+FLUSH_RECORDS = 4
+FLUSH_BYTES = 1024
+
+# Largest values the record's unsigned 16-bit and 32-bit fields can hold
+_U16_MAX = 0xFFFF
+_U32_MAX = 0xFFFFFFFF
+
+# Free heap (bytes) below which log_data runs a garbage collection
+GC_MIN_FREE = 20 * 1024
+
+# Bound once so the logging path does a single global lookup per call
+_time = time.time
+_localtime = time.localtime
+_fmt = format_datetime
+
+def _clamp(value, low, high):
+    """Limit value to the range low..high"""
+    return low if value < low else high if value > high else value
 
 class DataLogger:
     """Logs sensor data to filesystem and maintains history"""
@@ -17,6 +47,7 @@ class DataLogger:
         """
         self.monitor = monitor
         self.logger = logger
+        self._log = logger.log
         self.log_dir = log_dir
         self.log_filename = f"{log_dir}/{config.SENSOR_LOG_FILE}"
         
@@ -24,38 +55,104 @@ class DataLogger:
         self.last_log_time = time.time()
         self.log_interval = config.LOG_INTERVAL
         
-        # Reduced buffer size for better memory usage
-        self.data_history = CircularBuffer(config.CHART_HISTORY_POINTS)
+        # History ring of preallocated entries, updated in place so logging
+        # doesn't allocate a new dict every interval
+        self._capacity = config.CHART_HISTORY_POINTS
+        self._slots = [self._new_entry() for _ in range(self._capacity)]
+        self._idx = 0      # Next slot to overwrite
+        self._count = 0    # Number of slots holding data
         
         # Log file parameters
         self.max_log_size = config.MAX_LOG_SIZE
         self.max_backup_files = config.MAX_LOG_FILES
         
         # Initialize log file and directory
+        self._fresh_file = False  # Set when the log file is created
         self._ensure_log_directory()
         self._ensure_log_file()
         
+        # Track the log size in memory so log_data doesn't stat the file
+        self._log_size = self._get_log_size()
+        
+        # Records waiting to be written to the log file
+        self._pending = bytearray()
+        self._pending_count = 0
+        
+        # Cached get_log_status() result, cleared whenever the log changes
+        self._status_cache = None
+        
         # Load recent history from log file
         self.load_history()
     
+    def _new_entry(self):
+        """Create an empty history entry
+        
+        Returns:
+            dict: History entry with default values
+        """
+        return {
+            'timestamp': '',
+            'temp_c': 0.0,
+            'temp_f': 0.0,
+            'co2': 0,
+            'humidity': 0.0,
+            'pressure': 0.0,
+            'lux': 0.0
+        }
+    
+    def _next_slot(self):
+        """Claim the oldest history slot for a new entry
+        
+        Returns:
+            dict: History entry to overwrite in place
+        """
+        slot = self._slots[self._idx]
+        self._idx = (self._idx + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+        return slot
+    
+    def _iter_history(self):
+        """Yield history entries from oldest to newest"""
+        slots = self._slots
+        if self._count < self._capacity:
+            for i in range(self._count):
+                yield slots[i]
+        else:
+            for i in range(self._idx, self._capacity):
+                yield slots[i]
+            for i in range(self._idx):
+                yield slots[i]
+    
     def _ensure_log_directory(self):
         """Create log directory if it doesn't exist"""
         ensure_directory(self.log_dir)
     
     def _ensure_log_file(self):
-        """Create log file with header if it doesn't exist"""
+        """Create an empty binary log file if it doesn't exist"""
         try:
             try:
-                import os
                 os.stat(self.log_filename)
             except OSError:
-                with open(self.log_filename, 'w') as f:
-                    f.write("DateTime,Temperature_C,Temperature_F,CO2_PPM,Humidity%,Pressure,Light_Lux\n")
+                with open(self.log_filename, 'wb'):
+                    pass
+                self._fresh_file = True
                     
                 self.logger.log("LOGGER", f"Created new log file: {self.log_filename}", "INFO")
         except Exception as e:
             self.logger.log("LOGGER", "Error creating log file", "ERROR", str(e))
     
+    def _get_log_size(self):
+        """Get the current size of the log file in bytes
+        
+        Returns:
+            int: File size, or 0 if the file is missing
+        """
+        try:
+            return os.stat(self.log_filename)[6]
+        except OSError:
+            return 0
+    
     def _rotate_logs(self):
         """Rotate log files if main log exceeds size limit
         
@@ -63,14 +160,12 @@ class DataLogger:
             bool: True if rotation succeeded, False otherwise
         """
         try:
-            import os
+            # Check cached log size, counting records not yet written
+            if self._log_size + len(self._pending) < self.max_log_size:
+                return False
             
-            # Check current log size
-            try:
-                size = os.stat(self.log_filename)[6]
-                if size < self.max_log_size:
-                    return False
-            except OSError:
+            # Write buffered records to the file being rotated out
+            if not self.flush():
                 return False
             
             # Generate timestamp for backup filename
@@ -85,11 +180,14 @@ class DataLogger:
             # Rename current log to backup
             os.rename(self.log_filename, backup_path)
             
-            # Create new log file with header
+            # Create new empty log file
             self._ensure_log_file()
+            self._log_size = 0
+            self._status_cache = None
             
             # Clean up old backups
             self._cleanup_old_logs(base_name)
+            self.monitor.invalidate_storage()
             
             self.logger.log("LOGGER", f"Rotated log file, new backup: {backup_name}", "INFO")
             return True
@@ -105,161 +203,200 @@ class DataLogger:
             base_name: Base log filename
         """
         try:
-            import os
-            
-            # List all log backup files
-            backup_files = []
+            # Keep only the newest backups while scanning, so memory stays
+            # bounded by max_backup_files however many files are in log_dir.
+            # Names include the timestamp, so they sort oldest first.
+            prefix = base_name + '.'
+            newest = []
             for filename in os.listdir(self.log_dir):
-                if filename.startswith(base_name + '.'):
-                    backup_files.append(filename)
-            
-            # Sort files by name (includes timestamp)
-            backup_files.sort()
-            
-            # Remove oldest files if we have too many
-            while len(backup_files) > self.max_backup_files:
-                oldest = backup_files.pop(0)
-                try:
-                    os.remove(f"{self.log_dir}/{oldest}")
-                    self.logger.log("LOGGER", f"Deleted old log backup: {oldest}", "INFO")
-                except OSError:
-                    pass
+                if not filename.startswith(prefix):
+                    continue
+                newest.append(filename)
+                newest.sort()
+                
+                # Remove the oldest file once we have too many
+                if len(newest) > self.max_backup_files:
+                    oldest = newest.pop(0)
+                    try:
+                        os.remove(f"{self.log_dir}/{oldest}")
+                        self.logger.log("LOGGER", f"Deleted old log backup: {oldest}", "INFO")
+                    except OSError:
+                        pass
         except Exception as e:
             self.logger.log("LOGGER", "Log cleanup error", "ERROR", str(e))
     
     def load_history(self):
         """Load recent history from log file - memory optimized version"""
+        # Nothing to load from a log file created during this boot
+        if self._fresh_file:
+            return
+        
         feed_watchdog()
-        gc.collect()  # Free memory before operation
         
         try:
-            import os
+            # Skip files too small to hold a single record
+            size = self._get_log_size()
+            if size < RECORD_SIZE:
+                return
             
-            # Check if file exists
-            try:
-                os.stat(self.log_filename)
-            except OSError:
+            # Only read the last N whole records, aligned to the end of the
+            # file so a partially written record can't shift the others
+            count = min(size // RECORD_SIZE, config.CHART_HISTORY_POINTS)
+            if count == 0:
                 return
+            with open(self.log_filename, 'rb') as f:
+                f.seek(size - count * RECORD_SIZE)
+                buf = f.read(count * RECORD_SIZE)
             
-            # Memory-efficient reading of last few lines
-            with open(self.log_filename, 'r') as f:
-                # Skip header
-                f.readline()
-                
-                # Use a temporary buffer to store lines
-                lines = []
-                for line in f:
-                    lines.append(line)
-                    # Keep only the last N lines for memory efficiency
-                    if len(lines) > config.CHART_HISTORY_POINTS:
-                        lines.pop(0)
-                
-                # Parse lines into history
-                for line in lines:
-                    try:
-                        if line.strip() and not line.startswith('#'):
-                            parts = line.strip().split(',')
-                            # Ensure we have all fields (support both old and new format)
-                            if len(parts) >= 6:
-                                entry = {
-                                    'timestamp': parts[0],
-                                    'temp_c': float(parts[1]),
-                                    'temp_f': float(parts[2]),
-                                    'co2': int(parts[3]),
-                                    'humidity': float(parts[4]),
-                                    'pressure': float(parts[5]),
-                                    'lux': float(parts[6]) if len(parts) > 6 else 0.0  # Support old format
-                                }
-                                self.data_history.append(entry)
-                    except (ValueError, IndexError) as e:
-                        self.logger.log("LOGGER", f"Error parsing log line: {line.strip()}", "WARNING", str(e))
-                
-            self.logger.log("LOGGER", f"Loaded {len(lines)} history entries", "INFO")
+            # Unpack records into history
+            for offset in range(0, len(buf) - RECORD_SIZE + 1, RECORD_SIZE):
+                self._unpack_record(buf, offset, self._next_slot())
+            
+            self.logger.log("LOGGER", f"Loaded {self._count} history entries", "INFO")
             
             # Free memory after operation
-            del lines
+            del buf
             gc.collect()
                 
         except Exception as e:
             self.logger.log("LOGGER", "Error loading history", "ERROR", str(e))
     
-    def log_data(self, temp_c, temp_f, co2, humidity, pressure, lux=None):
+    def _unpack_record(self, buf, offset, entry):
+        """Fill a history entry from one binary log record
+        
+        Args:
+            buf: Buffer holding packed records
+            offset: Byte offset of the record within buf
+            entry: History entry to update in place
+        """
+        epoch, temp_c, co2, humidity, pressure, lux = struct.unpack_from(RECORD_FORMAT, buf, offset)
+        temp_c = temp_c / 10
+        entry['timestamp'] = _fmt(_localtime(epoch))
+        entry['temp_c'] = temp_c
+        entry['temp_f'] = round(celsius_to_fahrenheit(temp_c), 1)
+        entry['co2'] = co2
+        entry['humidity'] = humidity / 10
+        entry['pressure'] = float(pressure)
+        entry['lux'] = lux / 10
+    
+    def log_data(self, r):
         """Log sensor data if interval has elapsed
         
         Args:
-            temp_c: Temperature in Celsius
-            temp_f: Temperature in Fahrenheit
-            co2: CO2 concentration in ppm
-            humidity: Relative humidity in percent
-            pressure: Atmospheric pressure in hPa
-            lux: Light level in lux (optional)
+            r: Readings array from SensorManager.get_readings(), holding
+                co2 (ppm), temp_c, temp_f, humidity (%), pressure (hPa)
+                and lux at indexes 0-5
             
         Returns:
             bool: True if data was logged, False otherwise
         """
-        current_time = time.time()
+        current_time = _time()
         
         # Only log at specified interval
         if current_time - self.last_log_time < self.log_interval:
             return False
         
-        # Collect garbage before writing to file
-        gc.collect()
-        
         try:
             # Check if we need to rotate logs
             self._rotate_logs()
             
             # Format timestamp
-            timestamp = format_datetime(time.localtime())
+            timestamp = _fmt(_localtime())
             
-            # Create data record with only necessary data
+            # Round once and reuse the locals for both history and the record
             # Storing only core values to reduce memory usage
-            data = {
-                'timestamp': timestamp,
-                'temp_c': round(float(temp_c), 1),  # Round to reduce memory footprint
-                'temp_f': round(float(temp_f), 1),
-                'co2': int(co2),                    # Convert to int to save memory
-                'humidity': round(float(humidity), 1),
-                'pressure': round(float(pressure), 0),  # Round to integer for pressure
-                'lux': round(float(lux), 1) if lux is not None else 0.0  # Light level
-            }
-            
-            # Add to history
-            self.data_history.append(data)
+            co = int(r[0])                 # Convert to int to save memory
+            tc = round(r[1], 1)            # Round to reduce memory footprint
+            tf = round(r[2], 1)
+            hu = round(r[3], 1)
+            pr = round(r[4], 0)            # Round to integer for pressure
+            lx = round(r[5], 1)            # Light level
             
-            # Write to file efficiently
+            # Build the fixed-width binary record first, so a value that
+            # can't be packed leaves history and the log file unchanged.
+            # Values are clamped to the record's field ranges.
             try:
-                log_line = f"{timestamp},{data['temp_c']:.1f},{data['temp_f']:.1f},{data['co2']},{data['humidity']:.1f},{data['pressure']:.1f},{data['lux']:.1f}\n"
-                with open(self.log_filename, 'a') as f:
-                    f.write(log_line)
+                record = struct.pack(
+                    RECORD_FORMAT,
+                    int(current_time),
+                    _clamp(int(round(tc * 10)), -32768, 32767),
+                    _clamp(co, 0, _U16_MAX),
+                    _clamp(int(round(hu * 10)), 0, _U16_MAX),
+                    _clamp(int(pr), 0, _U16_MAX),
+                    _clamp(int(round(lx * 10)), 0, _U32_MAX)
+                )
             except Exception as e:
-                self.logger.log("LOGGER", "Error writing to log", "ERROR", str(e))
+                self._log("LOGGER", "Error writing to log", "ERROR", str(e))
                 return False
             
+            # Overwrite the oldest history entry in place
+            data = self._next_slot()
+            data['timestamp'] = timestamp
+            data['temp_c'] = tc
+            data['temp_f'] = tf
+            data['co2'] = co
+            data['humidity'] = hu
+            data['pressure'] = pr
+            data['lux'] = lx
+            
+            self._pending += record
+            self._pending_count += 1
+            self._status_cache = None
             self.last_log_time = current_time
-            gc.collect()  # Help manage memory
+            
+            # Write buffered records once enough have accumulated
+            if self._pending_count >= FLUSH_RECORDS or len(self._pending) > FLUSH_BYTES:
+                self.flush()
+            
+            # Only collect when the heap is getting low
+            if gc.mem_free() < GC_MIN_FREE:
+                gc.collect()
             
             # Log to console occasionally
-            self.logger.log(
+            self._log(
                 "DATA", 
-                f"Logged: CO2={co2}ppm, Temp={temp_c:.1f}°C, Humidity={humidity:.1f}%", 
+                f"Logged: CO2={co}ppm, Temp={tc:.1f}°C, Humidity={hu:.1f}%", 
                 "INFO"
             )
             
             return True
             
         except Exception as e:
-            self.logger.log("LOGGER", "Logging error", "ERROR", str(e))
+            self._log("LOGGER", "Logging error", "ERROR", str(e))
+            return False
+    
+    def flush(self):
+        """Write buffered records to the log file
+        
+        Returns:
+            bool: True if the buffer is empty afterwards, False otherwise
+        """
+        if not self._pending:
+            return True
+        
+        try:
+            with open(self.log_filename, 'ab') as f:
+                f.write(self._pending)
+            self._log_size += len(self._pending)
+            self._status_cache = None
+            self._pending = bytearray()
+            self._pending_count = 0
+            self.monitor.invalidate_storage()
+            return True
+        except Exception as e:
+            self._log("LOGGER", "Error writing to log", "ERROR", str(e))
             return False
     
     def get_history(self):
         """Get recent history entries
         
+        The entries are the live history slots and are reused as new data
+        is logged, so callers should serialize them rather than keep them.
+        
         Returns:
-            list: Recent history entries
+            list: Recent history entries, oldest first
         """
-        return self.data_history.get_all()
+        return list(self._iter_history())
     
     def get_daily_statistics(self):
         """Calculate daily statistics from history - memory optimized
@@ -268,7 +405,7 @@ class DataLogger:
             dict: Daily min/max values
         """
         try:
-            if not self.data_history or len(self.data_history) == 0:
+            if self._count == 0:
                 # Return defaults if no history
                 return {
                     'min_temp': 20.0,
@@ -283,34 +420,46 @@ class DataLogger:
                     'max_light': 100.0
                 }
             
-            # Process data more efficiently
-            entries = self.data_history.get_all()
+            # Single pass over history, tracking running min/max in locals
+            first = True
+            for entry in self._iter_history():
+                temp = entry['temp_c']
+                co2 = entry['co2']
+                humidity = entry['humidity']
+                pressure = entry['pressure']
+                light = entry.get('lux', 0.0)  # Support old format
+                if first:
+                    min_temp = max_temp = temp
+                    min_co2 = max_co2 = co2
+                    min_humidity = max_humidity = humidity
+                    min_pressure = max_pressure = pressure
+                    min_light = max_light = light
+                    first = False
+                    continue
+                if temp < min_temp: min_temp = temp
+                elif temp > max_temp: max_temp = temp
+                if co2 < min_co2: min_co2 = co2
+                elif co2 > max_co2: max_co2 = co2
+                if humidity < min_humidity: min_humidity = humidity
+                elif humidity > max_humidity: max_humidity = humidity
+                if pressure < min_pressure: min_pressure = pressure
+                elif pressure > max_pressure: max_pressure = pressure
+                if light < min_light: min_light = light
+                elif light > max_light: max_light = light
             
-            # Extract values directly into lists for better memory usage
-            temps = [entry['temp_c'] for entry in entries]
-            co2s = [entry['co2'] for entry in entries]
-            humidities = [entry['humidity'] for entry in entries]
-            pressures = [entry['pressure'] for entry in entries]
-            lights = [entry.get('lux', 0.0) for entry in entries]  # Support old format
-            
-            # Calculate stats
             stats = {
-                'min_temp': min(temps),
-                'max_temp': max(temps),
-                'min_co2': min(co2s),
-                'max_co2': max(co2s),
-                'min_humidity': min(humidities),
-                'max_humidity': max(humidities),
-                'min_pressure': min(pressures),
-                'max_pressure': max(pressures),
-                'min_light': min(lights),
-                'max_light': max(lights)
+                'min_temp': min_temp,
+                'max_temp': max_temp,
+                'min_co2': min_co2,
+                'max_co2': max_co2,
+                'min_humidity': min_humidity,
+                'max_humidity': max_humidity,
+                'min_pressure': min_pressure,
+                'max_pressure': max_pressure,
+                'min_light': min_light,
+                'max_light': max_light
             }
             
-            # Force cleanup
-            del temps, co2s, humidities, pressures, lights
-            gc.collect()
-            
             return stats
             
         except Exception as e:
@@ -332,12 +481,17 @@ class DataLogger:
     def emergency_memory_recovery(self):
         """Reduce memory usage in low-memory situations"""
         try:
+            # Don't risk losing buffered records if things get worse
+            self.flush()
+            
             # Clear history to minimum entries
-            if len(self.data_history) > 10:
-                temp_data = list(self.data_history)[-10:]  # Keep 10 most recent
-                self.data_history = CircularBuffer(10)
-                for entry in temp_data:
-                    self.data_history.append(entry)
+            if self._count > 10:
+                # Keep the 10 most recent entries and drop the other slots
+                self._slots = list(self._iter_history())[-10:]
+                self._capacity = 10
+                self._count = 10
+                self._idx = 0
+                self._status_cache = None
                 
                 self.logger.log("LOGGER", "Emergency memory recovery - history reduced", "WARNING")
                 gc.collect()
@@ -350,29 +504,24 @@ class DataLogger:
     def get_log_status(self):
         """Get current log file status - memory optimized
         
+        The result is cached until the log or history changes, and is built
+        from the tracked log size so no file I/O is needed.
+        
         Returns:
             dict: Log file status information
         """
+        if self._status_cache is not None:
+            return self._status_cache
+        
         try:
-            import os
-            
-            try:
-                stats = os.stat(self.log_filename)
-                size = stats[6]  # Size in bytes
-                
-                return {
-                    'size_kb': size / 1024,
-                    'percent_full': (size / self.max_log_size) * 100,
-                    'rotation_needed': size >= self.max_log_size,
-                    'entries': len(self.data_history)
-                }
-            except OSError:
-                return {
-                    'size_kb': 0,
-                    'percent_full': 0,
-                    'rotation_needed': False,
-                    'entries': 0
-                }
+            size = self._log_size  # Size in bytes
+            self._status_cache = {
+                'size_kb': size / 1024,
+                'percent_full': (size / self.max_log_size) * 100,
+                'rotation_needed': size >= self.max_log_size,
+                'entries': self._count
+            }
+            return self._status_cache
                 
         except Exception as e:
             self.logger.log("LOGGER", "Error getting log status", "ERROR", str(e))
@@ -1,10 +1,7 @@
 # main.py - Final version with a simplified main loop
 import time
-import json
-import network
 import gc
-import socket
-import select
+import errno
 from machine import I2C, Pin, reset, lightsleep
 
 # --- Core Application Modules ---
@@ -14,8 +11,7 @@ from sensor_manager import SensorManager
 from data_logger import DataLogger
 import config
 from web_template import create_html 
-# Note: send_chunked_html is now used inside web_server.py
-from utils import NetworkLogger, ExceptionHandler, SecurityManager, feed_watchdog, sync_time_periodic
+from utils import NetworkLogger, SecurityManager, feed_watchdog, sync_time_periodic
 from memory_handler import MemoryHandler
 from uploader import upload_data_to_server
 
@@ -25,7 +21,6 @@ def initialize_system():
     for attempt in range(3):  # Try 3 times before giving up
         try:
             print(f"[System] Starting initialization (attempt {attempt + 1}/3)...")
-            gc.collect()
             
             # Step 1: Basic components (these should never fail)
             print("[System] Creating logger...")
@@ -46,7 +41,7 @@ def initialize_system():
             
             print("[System] Configuring memory management...")
             memory_handler = MemoryHandler(logger)
-            memory_handler.register_component('data_logger', data_logger)
+            memory_handler.register_component('data_logger', data_logger, data_logger.emergency_memory_recovery)
 
             # Step 3: Network (most likely to fail)
             print("[System] Creating web server...")
@@ -63,7 +58,7 @@ def initialize_system():
             print("[System] ✓ All systems ready!")
             print(f"[System] ✓ WiFi connected: {web_server.ip_address}")
             print(f"[System] ✓ Web server running on port {config.WEB_SERVER_PORT}")
-            gc.collect()
+            gc.collect()  # Single collect once everything is built
             
             return {
                 'led': Pin("LED", Pin.OUT),
@@ -88,6 +83,30 @@ def initialize_system():
                 time.sleep(10)
                 reset()
 
+def log_cycle(sensor_manager, data_logger, logger):
+    """Read, log and upload one sample as a cooperative task
+    
+    Each step is a separate next() call from the main loop, so the listening
+    socket is polled between the sensor read, the flash write and the upload.
+    
+    Yields:
+        bool: True once a reading has been taken, False for later steps
+    """
+    try:
+        # The sensor manager's readings array is shared by both steps, so
+        # nothing is unpacked or copied
+        r = sensor_manager.get_readings()
+        if not r:
+            return
+        yield True
+        
+        data_logger.log_data(r)
+        yield False
+        
+        upload_data_to_server(r)
+    except Exception as e:
+        logger.log('DATA', str(e), 'ERROR')
+
 def main():
     try:
         components = initialize_system()
@@ -97,59 +116,103 @@ def main():
         html_shell = create_html(config)
         
         # --- NEW STEP: Give the web server the HTML to serve ---
+        # (stored as encoded bytes with a precomputed Content-Length)
         web_server.set_html_shell(html_shell)
         
-        # Free up the memory used by the local copy
+        # Free up the memory used by the str copy
         html_shell = None
         gc.collect()
 
         print(f"Server running at http://{web_server.ip_address}:{config.WEB_SERVER_PORT}")
         print("Main loop started. Use Ctrl+C to stop.")
 
-        last_log_time = time.time()
-        last_blink_time = time.time()
-        last_ntp_sync = time.time()  # Track last NTP sync time
+        # Periodic tasks are scheduled with wrap-safe millisecond ticks
+        log_interval_ms = config.LOG_INTERVAL * 1000
+        ntp_interval_ms = config.NTP_SYNC_INTERVAL * 1000
+        last_log_ms = time.ticks_ms()
+        last_blink_ms = last_log_ms
+        last_ntp_ms = last_log_ms  # Track last NTP sync time
+
+        # Bind components and hot methods to locals once, outside the loop.
+        # The listening socket is looked up on each accept because
+        # recover_socket() replaces it.
+        logger = components['logger']
+        sensor_manager = components['sensor_manager']
+        data_logger = components['data_logger']
+        memory_handler = components['memory_handler']
+        poll = web_server.poller.poll
+        validate_request = components['security_manager'].validate_request
+        handle_request = web_server.handle_request
+        reject_client = web_server.reject_client
+        toggle_led = components['led'].toggle
+        ticks_ms = time.ticks_ms
+        ticks_diff = time.ticks_diff
+        ticks_add = time.ticks_add
+        sleep_when_idle = config.SLEEP_WHEN_IDLE
 
-        # Main loop with bulletproof error handling
+        # Main loop with bulletproof error handling. After an error the poll
+        # timeout doubles (up to 5 s) instead of sleeping, so the loop keeps
+        # feeding the watchdog and serving requests while it backs off.
         consecutive_errors = 0
+        poll_timeout_ms = 100
+        log_task = None  # Running log_cycle() generator, if any
         while True:
+            events = None
             try:
                 if config.WATCHDOG_ENABLED:
                     feed_watchdog()
 
                 # Handle web requests
                 try:
-                    r, _, _ = select.select([web_server.socket], [], [], 0.1)
+                    events = poll(poll_timeout_ms)
                     
-                    if r:
-                        client, addr = web_server.socket.accept()
-                        
-                        if components['security_manager'].validate_request(addr[0]):
-                            web_server.handle_request(client)
-                        else:
-                            client.close() 
+                    if events:
+                        # Drain every pending connection before polling again;
+                        # the listening socket is non-blocking so accept()
+                        # raises EAGAIN once the queue is empty
+                        sock = web_server.socket
+                        while True:
+                            try:
+                                client, addr = sock.accept()
+                            except OSError as e:
+                                if e.args and e.args[0] == errno.EAGAIN:
+                                    break
+                                raise
+                            
+                            if validate_request(addr[0]):
+                                handle_request(client)
+                            else:
+                                reject_client(client)
                     
                     consecutive_errors = 0  # Reset error counter on success
+                    poll_timeout_ms = 100
                     
+                except MemoryError:
+                    # Typed branch so nothing is allocated to classify the error
+                    consecutive_errors += 1
+                    gc.collect()
+                    memory_handler.check_memory(force=True)
+
                 except OSError as e:
                     # Socket errors - try to recover
                     consecutive_errors += 1
-                    if "ECONNABORTED" in str(e) or "EBADF" in str(e):
+                    poll_timeout_ms = min(5000, poll_timeout_ms * 2)
+                    code = e.args[0] if e.args else None
+                    if code == errno.ECONNABORTED or code == errno.EBADF:
                         print(f"[Main] Socket error, attempting recovery...")
                         if web_server.recover_socket():
                             print(f"[Main] ✓ Socket recovery successful")
                             consecutive_errors = 0
+                            poll_timeout_ms = 100
                         else:
                             print(f"[Main] ✗ Socket recovery failed")
-                            time.sleep(5)
                     else:
                         print(f"[Main] Network error: {e}")
-                        time.sleep(2)
                         
                 except Exception as e:
                     consecutive_errors += 1
+                    poll_timeout_ms = min(5000, poll_timeout_ms * 2)
                     print(f"[Main] Request handling error: {e}")
-                    time.sleep(1)
                 
                 # If too many consecutive errors, try full restart
                 if consecutive_errors > 10:
@@ -164,42 +227,54 @@ def main():
                 time.sleep(5)
                 reset()
 
+            # Go straight back to poll() while clients are arriving; periodic
+            # tasks only run on iterations where the poll timed out
+            if events:
+                continue
+
             # -- Periodic Tasks --
-            current_time = time.time()
+            now_ms = ticks_ms()
 
-            if current_time - last_blink_time > 1:
-                components['led'].toggle()
-                last_blink_time = current_time
+            if ticks_diff(now_ms, last_blink_ms) > 1000:
+                toggle_led()
+                last_blink_ms = now_ms
+                logger.flush_if_stale()  # Don't leave quiet-period entries in RAM
                 
                 # Check network connection periodically
                 if not web_server.check_network_connection():
-                    components['logger'].log("NETWORK", "Network connection issues detected", "WARNING")
+                    logger.log("NETWORK", "Network connection issues detected", "WARNING")
             
             # Periodic NTP sync every 6 hours
-            if current_time - last_ntp_sync >= config.NTP_SYNC_INTERVAL:
-                if sync_time_periodic(components['logger']):
-                    last_ntp_sync = current_time
+            if ticks_diff(now_ms, last_ntp_ms) >= ntp_interval_ms:
+                if sync_time_periodic(logger):
+                    last_ntp_ms = now_ms
                 else:
                     # Retry in 30 minutes if sync failed
-                    last_ntp_sync = current_time - config.NTP_SYNC_INTERVAL + 1800
+                    last_ntp_ms = time.ticks_add(now_ms, 1800 * 1000 - ntp_interval_ms)
 
-            if current_time - last_log_time >= config.LOG_INTERVAL:
+            # Sensor log/upload runs one step per idle iteration
+            if log_task is None and ticks_diff(now_ms, last_log_ms) >= log_interval_ms:
+                log_task = log_cycle(sensor_manager, data_logger, logger)
+            if log_task is not None:
                 try:
-                    readings = components['sensor_manager'].get_readings()
-                    if readings:
-                        co2, temp_c, temp_f, humidity, pressure, lux = readings
-                        components['data_logger'].log_data(temp_c, temp_f, co2, humidity, pressure, lux)
-                        last_log_time = current_time
-
-                        upload_data = {
-                            "co2_ppm": co2, "temperature_c": temp_c,
-                            "humidity_percent": humidity, "pressure_hpa": pressure,
-                            "light_lux": lux
-                        }
-                        upload_data_to_server(upload_data)
-                        
-                except Exception as e:
-                    components['logger'].log('DATA', str(e), 'ERROR')
+                    if next(log_task):
+                        last_log_ms = now_ms
+                except StopIteration:
+                    log_task = None
+
+            # Optional power saving: lightsleep while no periodic task is due.
+            # The listening socket isn't polled during the sleep, so it is
+            # capped at the poll timeout; accept latency then grows by at
+            # most that much. Short gaps are left to the poll() timeout.
+            if sleep_when_idle and log_task is None:
+                now_ms = ticks_ms()
+                sleep_ms = min(
+                    ticks_diff(ticks_add(last_blink_ms, 1000), now_ms),
+                    ticks_diff(ticks_add(last_log_ms, log_interval_ms), now_ms),
+                    ticks_diff(ticks_add(last_ntp_ms, ntp_interval_ms), now_ms)
+                )
+                if sleep_ms > poll_timeout_ms:
+                    lightsleep(min(poll_timeout_ms, config.SLEEP_DURATION))
 
     except KeyboardInterrupt:
         print("\nShutdown requested by user.")
@@ -208,6 +283,10 @@ def main():
         time.sleep(10)
         reset()
     finally:
+        if 'components' in locals() and 'data_logger' in components:
+            components['data_logger'].flush()
+        if 'components' in locals() and 'logger' in components:
+            components['logger'].flush()
         if 'components' in locals() and 'web_server' in components:
             components['web_server'].shutdown()
             if 'led' in components:
@@ -0,0 +1,28 @@
+# manifest.py - Freeze project modules into a custom MicroPython firmware
+#
+# Frozen modules are stored as bytecode in flash, so their code objects and
+# constant tuples don't take up heap. Build the rp2 port with:
+#   make BOARD=RPI_PICO_W FROZEN_MANIFEST=/path/to/EnvMonitor/manifest.py
+#
+# Remove the matching .py files from the Pico's filesystem after flashing,
+# otherwise they are imported instead of the frozen copies. Keep secrets.py on
+# the filesystem so WiFi credentials can change without re-flashing, and keep
+# boot.py and main.py there too since MicroPython runs them from source.
+
+# Standard modules for the board (network, ntptime, webrepl, ...)
+include("$(BOARD_DIR)/manifest.py")
+
+module("config.py")
+
+# Application modules imported by main.py
+module("data_logger.py")
+module("memory_handler.py")
+module("scd4x.py")
+module("sensor_manager.py")
+module("sensors_page.py")
+module("system_monitor.py")
+module("uploader.py")
+module("utils.py")
+module("veml7700.py")
+module("web_server.py")
+module("web_template.py")
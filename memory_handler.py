@@ -15,6 +15,7 @@ class MemoryHandler:
         """
         self.logger = logger
         self.components = components or {}
+        self._recover = []  # (name, callback) pairs run by _emergency_recovery()
         
         # Simplified memory thresholds
         self.warning_threshold = config.MEMORY_WARNING_THRESHOLD
@@ -23,86 +24,75 @@ class MemoryHandler:
         
         # Simplified tracking
         self.last_collection = time.time()
-        self.collection_interval = config.GC_COLLECT_INTERVAL
         self.collection_count = 0
         self.emergency_count = 0
-        self.last_memory_percent = 0
         
-        # Initial collection
+        # Initial collection, then let the VM collect based on bytes allocated
         gc.collect()
+        self._set_gc_threshold()
+        
+        # The heap size is fixed, so convert the percentage thresholds to
+        # byte counts once and compare gc.mem_alloc() against them directly
+        self._total = gc.mem_free() + gc.mem_alloc()
+        self._warning_bytes = self._total * self.warning_threshold // 100
+        self._critical_bytes = self._total * self.critical_threshold // 100
+        self._emergency_bytes = self._total * self.emergency_threshold // 100
+        
+        # Reused by _get_memory_stats() so checks don't allocate a new dict
+        self._stats = {'free': 0, 'used': 0, 'total': self._total}
         self._get_memory_stats()
+    
+    def _set_gc_threshold(self):
+        """Run a collection after a fraction of the current free heap is allocated"""
+        gc.threshold(gc.mem_free() // config.GC_THRESHOLD_DIVISOR)
         
     def _get_memory_stats(self):
         """Get current memory statistics
         
+        The same dict is updated in place on every call, so callers must
+        copy any values they need to keep.
+        
         Returns:
             dict: Memory statistics
         """
-        free = gc.mem_free()
         alloc = gc.mem_alloc()
-        total = free + alloc
-        percent = (alloc / total) * 100 if total > 0 else 0
-        
-        # Determine color for UI visualization
-        if percent > self.emergency_threshold:
-            color = "#e74c3c"  # Red
-        elif percent > self.critical_threshold:
-            color = "#f39c12"  # Orange/amber
-        elif percent > self.warning_threshold:
-            color = "#f1c40f"  # Yellow
-        else:
-            color = "#27ae60"  # Green
-            
-        self.last_memory_percent = percent
-        
-        return {
-            'free': free,
-            'used': alloc,
-            'total': total,
-            'percent': percent,
-            'color': color
-        }
+        stats = self._stats
+        stats['free'] = self._total - alloc
+        stats['used'] = alloc
+        return stats
+    
+    def _percent(self, alloc):
+        """Convert an allocated byte count to percent of the heap"""
+        return (alloc / self._total) * 100 if self._total > 0 else 0
     
     def check_memory(self, force=False):
         """Check memory status and take appropriate action
         
+        Routine collections are left to the VM via gc.threshold(); this only
+        reads the stats and collects manually in an emergency.
+        
         Args:
-            force: Force check regardless of interval
+            force: Unused, kept for compatibility with existing callers
             
         Returns:
-            dict: Memory statistics or None if check skipped
+            dict: Memory statistics
         """
-        current_time = time.time()
-        
-        # Skip check if not forced and interval hasn't elapsed
-        if not force and current_time - self.last_collection < self.collection_interval:
-            return None
-        
-        # Perform garbage collection
-        gc.collect()
-        self.collection_count += 1
-        self.last_collection = current_time
-        
         # Get memory statistics
         stats = self._get_memory_stats()
-        percent = stats['percent']
+        alloc = stats['used']
         
-        # Handle memory levels
-        if percent > self.emergency_threshold:
-            self.logger.log("MEMORY", f"EMERGENCY: Memory usage at {percent:.1f}%", "CRITICAL")
+        # Handle memory levels; percentages are only computed for the log
+        if alloc > self._emergency_bytes:
+            self.logger.log("MEMORY", f"EMERGENCY: Memory usage at {self._percent(alloc):.1f}%", "CRITICAL")
             self._emergency_recovery()
             self.emergency_count += 1
-            # After recovery, collect and update stats
-            gc.collect()
             stats = self._get_memory_stats()
             
-        elif percent > self.critical_threshold:
-            self.logger.log("MEMORY", f"Critical memory usage: {percent:.1f}%", "WARNING")
-            # Additional collection might help
-            gc.collect()
+        elif alloc > self._critical_bytes:
+            self.logger.log("MEMORY", f"Critical memory usage: {self._percent(alloc):.1f}%", "WARNING")
             
-        elif percent > self.warning_threshold:
-            self.logger.log("MEMORY", f"High memory usage: {percent:.1f}%", "INFO")
+        elif alloc > self._warning_bytes:
+            self.logger.log("MEMORY", f"High memory usage: {self._percent(alloc):.1f}%", "INFO")
         
         return stats
     
@@ -112,16 +102,19 @@ class MemoryHandler:
         
         actions_taken = []
         
-        # Try data_logger recovery first
-        if 'data_logger' in self.components:
+        # Run the recovery callbacks registered by components, in order
+        for name, recover in self._recover:
             try:
-                if self.components['data_logger'].emergency_memory_recovery():
-                    actions_taken.append("Reduced data history")
+                if recover():
+                    actions_taken.append(f"Recovered {name}")
             except Exception as e:
-                self.logger.log("MEMORY", f"Data logger recovery error: {e}", "ERROR")
+                self.logger.log("MEMORY", f"{name} recovery error: {e}", "ERROR")
         
-        # Force garbage collection
+        # Force garbage collection and rebase the threshold on what's left
         gc.collect()
+        self.collection_count += 1
+        self.last_collection = time.time()
+        self._set_gc_threshold()
         actions_taken.append("Forced garbage collection")
         
         if actions_taken:
@@ -142,21 +135,24 @@ class MemoryHandler:
             'free_kb': stats['free'] / 1024,
             'used_kb': stats['used'] / 1024, 
             'total_kb': stats['total'] / 1024,
-            'percent': stats['percent'],
-            'color': stats['color'],
+            'percent': self._percent(stats['used']),
             'collections': self.collection_count,
             'emergencies': self.emergency_count,
             'last_collection': self.last_collection
         }
         
-    def register_component(self, name, component):
+    def register_component(self, name, component, recover_fn=None):
         """Register a component for memory recovery
         
         Args:
             name: Component name
             component: Component instance
+            recover_fn: Optional callable run during emergency recovery,
+                returning True if it freed memory
         """
         self.components[name] = component
+        if recover_fn is not None:
+            self._recover.append((name, recover_fn))
         
     def is_memory_critical(self):
         """Check if memory is in a critical state
@@ -164,4 +160,4 @@ class MemoryHandler:
         Returns:
             bool: True if memory usage is critical
         """
-        return self.last_memory_percent > self.critical_threshold
\ No newline at end of file
+        return gc.mem_alloc() > self._critical_bytes
\ No newline at end of file
@@ -1,207 +1,295 @@
 # scd4x.py - Enhanced SCD4X CO2 sensor driver with improved reliability
 from machine import I2C
 import time
-import struct
+import micropython
 from micropython import const
 import config
+from utils import RetryWithBackoff
 
 # Constants for SCD4X
 SCD4X_DEFAULT_ADDR = const(0x62)
 
-# Command registers
-_SCD4X_REINIT = const(0x3646)
-_SCD4X_FACTORYRESET = const(0x3632)
-_SCD4X_FORCEDRECAL = const(0x362F)
-_SCD4X_SELFTEST = const(0x3639)
-_SCD4X_DATAREADY = const(0xE4B8)
-_SCD4X_STOPPERIODICMEASUREMENT = const(0x3F86)
-_SCD4X_STARTPERIODICMEASUREMENT = const(0x21B1)
-_SCD4X_STARTLOWPOWERPERIODICMEASUREMENT = const(0x21AC)
-_SCD4X_READMEASUREMENT = const(0xEC05)
-_SCD4X_SERIALNUMBER = const(0x3682)
-_SCD4X_GETTEMPOFFSET = const(0x2318)
-_SCD4X_SETTEMPOFFSET = const(0x241D)
-_SCD4X_GETALTITUDE = const(0x2322)
-_SCD4X_SETALTITUDE = const(0x2427)
-_SCD4X_SETPRESSURE = const(0xE000)
-_SCD4X_PERSISTSETTINGS = const(0x3615)
-_SCD4X_GETASCE = const(0x2313)
-_SCD4X_SETASCE = const(0x2416)
-_SCD4X_MEASURESINGLESHOT = const(0x219D)
-_SCD4X_MEASURESINGLESHOTRHTONLY = const(0x2196)
+# Command registers, stored as the 2 bytes sent on the bus
+_SCD4X_REINIT = b'\x36\x46'
+_SCD4X_FACTORYRESET = b'\x36\x32'
+_SCD4X_FORCEDRECAL = b'\x36\x2F'
+_SCD4X_SELFTEST = b'\x36\x39'
+_SCD4X_DATAREADY = b'\xE4\xB8'
+_SCD4X_STOPPERIODICMEASUREMENT = b'\x3F\x86'
+_SCD4X_STARTPERIODICMEASUREMENT = b'\x21\xB1'
+_SCD4X_STARTLOWPOWERPERIODICMEASUREMENT = b'\x21\xAC'
+_SCD4X_READMEASUREMENT = b'\xEC\x05'
+_SCD4X_SERIALNUMBER = b'\x36\x82'
+_SCD4X_GETTEMPOFFSET = b'\x23\x18'
+_SCD4X_SETTEMPOFFSET = b'\x24\x1D'
+_SCD4X_GETALTITUDE = b'\x23\x22'
+_SCD4X_SETALTITUDE = b'\x24\x27'
+_SCD4X_SETPRESSURE = b'\xE0\x00'
+_SCD4X_PERSISTSETTINGS = b'\x36\x15'
+_SCD4X_GETASCE = b'\x23\x13'
+_SCD4X_SETASCE = b'\x24\x16'
+_SCD4X_MEASURESINGLESHOT = b'\x21\x9D'
+_SCD4X_MEASURESINGLESHOTRHTONLY = b'\x21\x96'
+
+# Console diagnostics are off unless enabled in config
+_DEBUG = config.SCD4X_DEBUG
+
+# Retry policy shared by the I2C helpers: MAX_CONSECUTIVE_ERRORS attempts in
+# total, backing off from SENSOR_RETRY_DELAY. Only bus errors are retried at
+# the transfer level; a whole measurement read is retried on any error.
+_retry_io = RetryWithBackoff(max_retries=config.MAX_CONSECUTIVE_ERRORS - 1,
+                             base_delay=config.SENSOR_RETRY_DELAY,
+                             exceptions=(OSError,))
+_retry_read = RetryWithBackoff(max_retries=config.MAX_CONSECUTIVE_ERRORS - 1,
+                               base_delay=config.SENSOR_RETRY_DELAY)
+
+# Periodic mode produces a sample every 5 s; data_ready doesn't ask the
+# sensor until this long after the last one was read
+_SAMPLE_PERIOD_MS = const(4900)
+
+# Time the sensor needs after power-up before it accepts commands
+_POWER_UP_MS = const(30)
+
+# Valid reading ranges, unpacked once so validation only compares locals
+_CO2_LO, _CO2_HI = config.VALID_CO2_RANGE
+_T_LO, _T_HI = config.VALID_TEMP_RANGE
+_H_LO, _H_HI = config.VALID_HUMIDITY_RANGE
+
+# Raw word to engineering unit scaling, with the configured temperature
+# offset folded into the baseline
+_TEMP_SCALE = 175.0 / 65535.0
+_HUMI_SCALE = 100.0 / 65535.0
+_TEMP_BASE = -45.0 + config.TEMP_OFFSET
+
+# CRC-8 lookup table for the Sensirion polynomial 0x31 (init 0xFF). Kept as
+# bytes so it stays in flash when the module is frozen.
+_CRC8_TABLE = (
+    b'\x00\x31\x62\x53\xc4\xf5\xa6\x97\xb9\x88\xdb\xea\x7d\x4c\x1f\x2e'
+    b'\x43\x72\x21\x10\x87\xb6\xe5\xd4\xfa\xcb\x98\xa9\x3e\x0f\x5c\x6d'
+    b'\x86\xb7\xe4\xd5\x42\x73\x20\x11\x3f\x0e\x5d\x6c\xfb\xca\x99\xa8'
+    b'\xc5\xf4\xa7\x96\x01\x30\x63\x52\x7c\x4d\x1e\x2f\xb8\x89\xda\xeb'
+    b'\x3d\x0c\x5f\x6e\xf9\xc8\x9b\xaa\x84\xb5\xe6\xd7\x40\x71\x22\x13'
+    b'\x7e\x4f\x1c\x2d\xba\x8b\xd8\xe9\xc7\xf6\xa5\x94\x03\x32\x61\x50'
+    b'\xbb\x8a\xd9\xe8\x7f\x4e\x1d\x2c\x02\x33\x60\x51\xc6\xf7\xa4\x95'
+    b'\xf8\xc9\x9a\xab\x3c\x0d\x5e\x6f\x41\x70\x23\x12\x85\xb4\xe7\xd6'
+    b'\x7a\x4b\x18\x29\xbe\x8f\xdc\xed\xc3\xf2\xa1\x90\x07\x36\x65\x54'
+    b'\x39\x08\x5b\x6a\xfd\xcc\x9f\xae\x80\xb1\xe2\xd3\x44\x75\x26\x17'
+    b'\xfc\xcd\x9e\xaf\x38\x09\x5a\x6b\x45\x74\x27\x16\x81\xb0\xe3\xd2'
+    b'\xbf\x8e\xdd\xec\x7b\x4a\x19\x28\x06\x37\x64\x55\xc2\xf3\xa0\x91'
+    b'\x47\x76\x25\x14\x83\xb2\xe1\xd0\xfe\xcf\x9c\xad\x3a\x0b\x58\x69'
+    b'\x04\x35\x66\x57\xc0\xf1\xa2\x93\xbd\x8c\xdf\xee\x79\x48\x1b\x2a'
+    b'\xc1\xf0\xa3\x92\x05\x34\x67\x56\x78\x49\x1a\x2b\xbc\x8d\xde\xef'
+    b'\x82\xb3\xe0\xd1\x46\x77\x24\x15\x3b\x0a\x59\x68\xff\xce\x9d\xac'
+)
+
+# Native-code check of every 3-byte word (2 data bytes + CRC) in a reply
+@micropython.viper
+def _crc_words_ok(buf: ptr8, n: int) -> int:
+    tbl = ptr8(_CRC8_TABLE)
+    i = 0
+    while i + 2 < n:
+        if tbl[tbl[0xFF ^ buf[i]] ^ buf[i + 1]] != buf[i + 2]:
+            return 0
+        i += 3
+    return 1
 
 class SCD4X:
     """Driver for Sensirion SCD4X CO2 sensor with enhanced error handling"""
     
-    def __init__(self, i2c, address=None):
+    def __init__(self, i2c, address=None, auto_init=True):
         """Initialize the SCD4X CO2 sensor
         
         Args:
             i2c: I2C bus instance
             address: Optional I2C address override
+            auto_init: Configure the sensor, start measuring and wait for the
+                first measurement here. Pass False to call configure() and
+                wait for data_ready yourself.
         """
-        print("[SCD4X] Initializing SCD4X CO2 sensor")
+        if _DEBUG:
+            print("[SCD4X] Initializing SCD4X CO2 sensor")
         self.i2c = i2c
         self.address = address if address is not None else config.SCD4X_I2C_ADDR
         self._buffer = bytearray(18)
-        self._cmd = bytearray(2)
-        self._crc_buffer = bytearray(2)
+        # Views over the buffer, so reads and writes of part of it don't copy
+        self._buf_mv = memoryview(self._buffer)
 
         self._temperature = None
         self._relative_humidity = None
         self._co2 = None
         self._pressure = config.SENSOR_PRESSURE
-
-        # Add delay before first command
-        time.sleep(config.SENSOR_RETRY_DELAY)
+        self._last_sample_ts = None  # ticks_ms() of the last measurement read
+
+        if auto_init:
+            # Only a cold boot needs a delay before the first command, and
+            # only until the sensor's power-up time has passed
+            needed = _POWER_UP_MS - time.ticks_ms()
+            if needed > 0:
+                time.sleep_ms(needed)
+            
+            if self.configure():
+                if _DEBUG:
+                    print("[SCD4X] Waiting %ss for first measurement" % config.SENSOR_INIT_DELAY)
+                time.sleep(config.SENSOR_INIT_DELAY)
         
-        self._init_sensor()
+    def configure(self):
+        """Stop any measurement, apply the config settings and start measuring
         
-    def _init_sensor(self):
-        """Initialize the sensor with proper error handling"""
+        Returns:
+            bool: True if the sensor was configured, False after 3 failed attempts
+        """
         for attempt in range(3):  # Try up to 3 times
             try:
-                print(f"[SCD4X] Initialization attempt {attempt+1}/3")
+                if _DEBUG:
+                    print("[SCD4X] Initialization attempt %d/3" % (attempt + 1))
                 
-                # Try to stop any ongoing measurements
+                # Try to stop any ongoing measurements; the config commands
+                # that follow wait out the stop themselves
                 try:
-                    self.stop_periodic_measurement()
+                    self.stop_periodic_measurement(wait=False)
                 except OSError as e:
-                    print(f"[SCD4X] Initial stop measurement failed: {e}")
+                    if _DEBUG:
+                        print("[SCD4X] Initial stop measurement failed: %s" % e)
                     self._soft_reset()
-                    time.sleep(config.SENSOR_RETRY_DELAY)
                     self.stop_periodic_measurement()
                 
                 # Configure sensor with settings from config
                 if self.initialize_with_config():
-                    print("[SCD4X] Sensor initialized successfully")
+                    if _DEBUG:
+                        print("[SCD4X] Sensor initialized successfully")
                     return True
             except Exception as e:
-                print(f"[SCD4X] Initialization error: {e}")
+                if _DEBUG:
+                    print("[SCD4X] Initialization error: %s" % e)
                 if attempt < 2:  # Don't sleep after last attempt
                     time.sleep(config.SENSOR_RETRY_DELAY)
                     
-        print("[SCD4X] Failed to initialize after multiple attempts")
+        if _DEBUG:
+            print("[SCD4X] Failed to initialize after multiple attempts")
         return False
 
     def _soft_reset(self):
-        """Perform a soft reset of the sensor"""
+        """Perform a soft reset of the sensor
+        
+        Only waits out reinit's 30 ms execution time from the datasheet; the
+        sensor takes the next command straight after that.
+        """
         try:
-            print("[SCD4X] Performing soft reset")
-            self._send_command(_SCD4X_REINIT, cmd_delay=0.02)
+            if _DEBUG:
+                print("[SCD4X] Performing soft reset")
+            self._send_command(_SCD4X_REINIT, cmd_delay=0.03)
         except Exception as e:
-            print(f"[SCD4X] Soft reset error: {e}")
-        time.sleep(config.SENSOR_RETRY_DELAY)
+            if _DEBUG:
+                print("[SCD4X] Soft reset error: %s" % e)
 
+    @_retry_io
     def _send_command(self, cmd, cmd_delay=0):
-        """Send command to the sensor with retry logic
+        """Send command to the sensor, retrying on I2C errors
         
         Args:
-            cmd: Command code
-            cmd_delay: Delay after sending command
+            cmd: Command code as 2 bytes, e.g. _SCD4X_REINIT
+            cmd_delay: Command execution time from the datasheet, in seconds
         """
-        retry_count = config.MAX_CONSECUTIVE_ERRORS
-        while retry_count > 0:
-            try:
-                self._cmd[0] = (cmd >> 8) & 0xFF
-                self._cmd[1] = cmd & 0xFF
-                self.i2c.writeto(self.address, self._cmd)
-                time.sleep(0.01)  # Small delay after I2C operation
-                if cmd_delay > 0:
-                    time.sleep(cmd_delay)
-                return
-            except OSError as e:
-                retry_count -= 1
-                if retry_count == 0:
-                    print(f"[SCD4X] Command failed after retries: {e}")
-                    raise e
-                print(f"[SCD4X] Command retry after error")
-                time.sleep(config.SENSOR_RETRY_DELAY)
-
-    def _set_command_value(self, cmd, value, cmd_delay=0):
-        """Send command with value to the sensor
+        self.i2c.writeto(self.address, cmd)
+        if cmd_delay > 0:
+            time.sleep(cmd_delay)
+
+    @_retry_io
+    def _set_command_value(self, cmd, value, cmd_delay=0.001):
+        """Send command with value to the sensor, retrying on I2C errors
         
         Args:
-            cmd: Command code
+            cmd: Command code as 2 bytes
             value: Value to send
-            cmd_delay: Delay after sending command
+            cmd_delay: Command execution time from the datasheet, in seconds
+                (1 ms for all of the set commands)
         """
-        retry_count = config.MAX_CONSECUTIVE_ERRORS
-        while retry_count > 0:
-            try:
-                self._buffer[0] = (cmd >> 8) & 0xFF
-                self._buffer[1] = cmd & 0xFF
-                self._crc_buffer[0] = self._buffer[2] = (value >> 8) & 0xFF
-                self._crc_buffer[1] = self._buffer[3] = value & 0xFF
-                self._buffer[4] = self._crc8(self._crc_buffer)
-                self.i2c.writeto(self.address, self._buffer[:5])
-                time.sleep(0.01)  # Small delay after I2C operation
-                if cmd_delay > 0:
-                    time.sleep(cmd_delay)
-                return
-            except OSError as e:
-                retry_count -= 1
-                if retry_count == 0:
-                    print(f"[SCD4X] Command with value failed: {e}")
-                    raise e
-                print(f"[SCD4X] Command with value retry")
-                time.sleep(config.SENSOR_RETRY_DELAY)
+        self._buffer[0] = cmd[0]
+        self._buffer[1] = cmd[1]
+        self._buffer[2] = (value >> 8) & 0xFF
+        self._buffer[3] = value & 0xFF
+        self._buffer[4] = self._crc8_2(self._buffer[2], self._buffer[3])
+        self.i2c.writeto(self.address, self._buf_mv[:5])
+        if cmd_delay > 0:
+            time.sleep(cmd_delay)
+
+    @_retry_io
+    def _send_commands_batch(self, cmds):
+        """Send several set commands back to back, retrying on I2C errors
+        
+        Args:
+            cmds: Sequence of (cmd, value) pairs, at most 3
+        """
+        self._write_commands(cmds)
 
+    def _write_commands(self, cmds):
+        """Send several set commands back to back, without retries
+        
+        All frames are built into the buffer first and then written with only
+        the 1 ms execution time between them. Each command is still its own
+        I2C write, since the sensor takes one command per transaction and
+        writevto() would join them into one.
+        
+        Args:
+            cmds: Sequence of (cmd, value) pairs, at most 3
+        """
+        buf = self._buffer
+        end = 0
+        for cmd, value in cmds:
+            buf[end] = cmd[0]
+            buf[end + 1] = cmd[1]
+            buf[end + 2] = (value >> 8) & 0xFF
+            buf[end + 3] = value & 0xFF
+            buf[end + 4] = self._crc8_2(buf[end + 2], buf[end + 3])
+            end += 5
+        
+        frames = self._buf_mv
+        for start in range(0, end, 5):
+            self.i2c.writeto(self.address, frames[start:start + 5])
+            time.sleep(0.001)
+
+    @_retry_io
     def _read_reply(self, num):
-        """Read reply from the sensor
+        """Read reply from the sensor, retrying on I2C errors
         
         Args:
             num: Number of bytes to read
         """
-        retry_count = config.MAX_CONSECUTIVE_ERRORS
-        while retry_count > 0:
-            try:
-                read_data = self.i2c.readfrom(self.address, num)
-                for i in range(num):
-                    self._buffer[i] = read_data[i]
-                self._check_buffer_crc(self._buffer[:num])
-                return
-            except OSError as e:
-                retry_count -= 1
-                if retry_count == 0:
-                    print(f"[SCD4X] Read reply failed: {e}")
-                    raise e
-                print(f"[SCD4X] Read reply retry")
-                time.sleep(config.SENSOR_RETRY_DELAY)
-
-    def _check_buffer_crc(self, buf):
-        """Check CRC of received data"""
-        for i in range(0, len(buf), 3):
-            if i+2 < len(buf) and self._crc8(buf[i:i+2]) != buf[i+2]:
-                raise RuntimeError("CRC check failed")
+        self.i2c.readfrom_into(self.address, self._buf_mv[:num])
+        self._check_buffer_crc(num)
+
+    def _check_buffer_crc(self, num):
+        """Check CRC of the first num bytes received into the buffer"""
+        if not _crc_words_ok(self._buffer, num):
+            raise RuntimeError("CRC check failed")
 
     @staticmethod
-    def _crc8(buffer):
-        """Calculate CRC-8 checksum"""
-        crc = 0xFF
-        for byte in buffer:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ 0x31
-                else:
-                    crc <<= 1
-        return crc & 0xFF
-
-    def stop_periodic_measurement(self):
-        """Stop periodic measurement."""
-        self._send_command(_SCD4X_STOPPERIODICMEASUREMENT, cmd_delay=0.5)
+    def _crc8_2(b0, b1):
+        """Calculate CRC-8 checksum of a single 2-byte word"""
+        return _CRC8_TABLE[_CRC8_TABLE[0xFF ^ b0] ^ b1]
+
+    def stop_periodic_measurement(self, wait=True):
+        """Stop periodic measurement.
+        
+        Args:
+            wait: Sleep for the full 500 ms maximum execution time. Pass False
+                if the next command retries until the sensor acknowledges it.
+        """
+        self._send_command(_SCD4X_STOPPERIODICMEASUREMENT, cmd_delay=0.5 if wait else 0)
 
     def start_periodic_measurement(self):
-        """Start periodic measurement."""
+        """Start periodic measurement.
+        
+        The command takes effect immediately; the first sample follows
+        about 5 s later, so callers wait on data_ready rather than here.
+        """
         self._send_command(_SCD4X_STARTPERIODICMEASUREMENT)
-        time.sleep(1)
 
     def get_temperature_offset(self):
         """Get the current temperature offset in degrees C."""
         self._send_command(_SCD4X_GETTEMPOFFSET, cmd_delay=0.001)
         self._read_reply(3)
-        temp_offset_raw = struct.unpack_from(">H", self._buffer[0:2])[0]
+        temp_offset_raw = int.from_bytes(self._buf_mv[0:2], 'big')
         return temp_offset_raw * 175.0 / 65535.0
 
     def set_temperature_offset(self, offset_c):
@@ -213,79 +301,109 @@ class SCD4X:
 
     @property
     def data_ready(self):
-        """Check if data is ready to be read."""
+        """Check if data is ready to be read.
+        
+        Returns False without any I2C traffic until a new periodic sample
+        can be due.
+        """
+        if (self._last_sample_ts is not None and
+                time.ticks_diff(time.ticks_ms(), self._last_sample_ts) < _SAMPLE_PERIOD_MS):
+            return False
         try:
             self._send_command(_SCD4X_DATAREADY, cmd_delay=0.001)
             self._read_reply(3)
             return not ((self._buffer[0] & 0x07 == 0) and (self._buffer[1] == 0))
         except Exception as e:
-            print(f"[SCD4X] Error checking data ready: {e}")
+            if _DEBUG:
+                print("[SCD4X] Error checking data ready: %s" % e)
             return False
 
+    @_retry_read
     def _read_data(self):
-        """Internal method to read sensor data."""
-        retry_count = config.MAX_CONSECUTIVE_ERRORS
-        while retry_count > 0:
-            try:
-                self._send_command(_SCD4X_READMEASUREMENT, cmd_delay=0.001)
-                self._read_reply(9)
-                
-                self._co2 = struct.unpack_from(">H", self._buffer[0:2])[0]
-                temp_raw = struct.unpack_from(">H", self._buffer[3:5])[0]
-
-                if temp_raw == 0:
-                    self._temperature = -45
-                elif temp_raw == 65535:
-                    self._temperature = 130
-                else:
-                    self._temperature = -45 + 175 * (temp_raw / 65535)
-
-                # Apply temperature offset from config
-                self._temperature += config.TEMP_OFFSET
+        """Internal method to read sensor data.
+        
+        Retried on any error, so CRC failures and out-of-range values are
+        read again as well.
+        """
+        self._send_command(_SCD4X_READMEASUREMENT, cmd_delay=0.001)
+        self._read_reply(9)
+        
+        buf = self._buffer
+        self._co2 = (buf[0] << 8) | buf[1]
+        temp_raw = (buf[3] << 8) | buf[4]
+        humi_raw = (buf[6] << 8) | buf[7]
 
-                humi_raw = struct.unpack_from(">H", self._buffer[6:8])[0]
-                self._relative_humidity = 100 * (humi_raw / 65535)
+        # Temperature includes the offset from config
+        self._temperature = _TEMP_BASE + temp_raw * _TEMP_SCALE
+        self._relative_humidity = humi_raw * _HUMI_SCALE
 
-                # Validate readings
-                if not self._validate_readings():
-                    raise ValueError("Readings outside valid ranges")
+        self._last_sample_ts = time.ticks_ms()
 
-                return
-            except Exception as e:
-                retry_count -= 1
-                if retry_count == 0:
-                    print(f"[SCD4X] Error reading data: {e}")
-                    raise
-                print("[SCD4X] Retrying data read")
-                time.sleep(config.SENSOR_RETRY_DELAY)
+        # Validate readings
+        if not self._validate_readings():
+            raise ValueError("Readings outside valid ranges")
 
     def _validate_readings(self):
         """Validate all sensor readings against config ranges."""
         return (
-            config.VALID_CO2_RANGE[0] <= self._co2 <= config.VALID_CO2_RANGE[1] and
-            config.VALID_TEMP_RANGE[0] <= self._temperature <= config.VALID_TEMP_RANGE[1] and
-            config.VALID_HUMIDITY_RANGE[0] <= self._relative_humidity <= config.VALID_HUMIDITY_RANGE[1]
+            _CO2_LO <= self._co2 <= _CO2_HI and
+            _T_LO <= self._temperature <= _T_HI and
+            _H_LO <= self._relative_humidity <= _H_HI
         )
 
+    def sample(self, wait=True, timeout_ms=6000, check_ready=True):
+        """Read a new measurement into CO2, temperature and relative_humidity
+        
+        Args:
+            wait: Poll data_ready every 50 ms until a measurement is ready.
+                If False, return straight away when none is.
+            timeout_ms: Longest time to wait; a periodic sample is due every 5 s
+            check_ready: If False, read without asking the sensor whether a
+                measurement is ready, for callers that just saw data_ready
+            
+        Returns:
+            bool: True if a new measurement was read
+        """
+        if check_ready:
+            if wait:
+                deadline = time.ticks_add(time.ticks_ms(), timeout_ms)
+                while not self.data_ready:
+                    if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                        return False
+                    time.sleep_ms(50)
+            elif not self.data_ready:
+                return False
+        self._read_data()
+        return True
+
+    def read_all(self, check_ready=True):
+        """Read CO2, temperature and humidity if a new measurement is ready
+        
+        Args:
+            check_ready: If False, read without asking the sensor whether a
+                measurement is ready (see sample())
+        
+        Returns:
+            tuple: (co2, temperature, relative_humidity), or None if no new
+                measurement is ready
+        """
+        if not self.sample(wait=False, check_ready=check_ready):
+            return None
+        return self._co2, self._temperature, self._relative_humidity
+
     @property
     def CO2(self):
-        """Get CO2 measurement in ppm."""
-        if self.data_ready:
-            self._read_data()
+        """Get the last CO2 measurement in ppm (see sample())."""
         return self._co2
 
     @property
     def temperature(self):
-        """Get temperature in degrees Celsius."""
-        if self.data_ready:
-            self._read_data()
+        """Get the last temperature in degrees Celsius (see sample())."""
         return self._temperature
 
     @property
     def relative_humidity(self):
-        """Get relative humidity in percent."""
-        if self.data_ready:
-            self._read_data()
+        """Get the last relative humidity in percent (see sample())."""
         return self._relative_humidity
 
     @property
@@ -314,14 +432,14 @@ class SCD4X:
         """Perform a self-test."""
         self._send_command(_SCD4X_SELFTEST, cmd_delay=10)
         self._read_reply(3)
-        return (self._buffer[0] << 8) | self._buffer[1]
+        return int.from_bytes(self._buf_mv[0:2], 'big')
 
     def get_serial_number(self):
         """Get the serial number of the sensor."""
         self._send_command(_SCD4X_SERIALNUMBER, cmd_delay=0.001)
         self._read_reply(9)
-        return (self._buffer[0] << 40) | (self._buffer[1] << 32) | (self._buffer[3] << 24) | \
-               (self._buffer[4] << 16) | (self._buffer[6] << 8) | self._buffer[7]
+        buf = self._buffer
+        return int.from_bytes(bytes((buf[0], buf[1], buf[3], buf[4], buf[6], buf[7])), 'big')
 
     def persist_settings(self):
         """Persist settings to EEPROM."""
@@ -330,14 +448,30 @@ class SCD4X:
     def initialize_with_config(self):
         """Initialize sensor with settings from config file."""
         try:
-            print("[SCD4X] Configuring sensor with settings from config")
-            self.set_altitude(config.SENSOR_ALTITUDE)
-            self.set_ambient_pressure(config.SENSOR_PRESSURE)
-            self.set_temperature_offset(config.TEMP_OFFSET)
+            if _DEBUG:
+                print("[SCD4X] Configuring sensor with settings from config")
+            if not 0 <= config.TEMP_OFFSET <= 175:
+                raise ValueError("Offset must be between 0 and 175 degrees C")
+            self._pressure = config.SENSOR_PRESSURE
+            cmds = (
+                (_SCD4X_SETALTITUDE, config.SENSOR_ALTITUDE),
+                (_SCD4X_SETPRESSURE, config.SENSOR_PRESSURE),
+                (_SCD4X_SETTEMPOFFSET, int(config.TEMP_OFFSET * 65535 / 175)),
+            )
+            # A stop sent just before takes up to 500 ms, but usually far
+            # less, and the sensor NAKs while it is busy. Retry every 50 ms
+            # over that window, then fall back to the normal retry policy.
+            for _ in range(10):
+                try:
+                    self._write_commands(cmds)
+                    break
+                except OSError:
+                    time.sleep_ms(50)
+            else:
+                self._send_commands_batch(cmds)
             self.start_periodic_measurement()
-            print(f"[SCD4X] Waiting {config.SENSOR_INIT_DELAY}s for first measurement")
-            time.sleep(config.SENSOR_INIT_DELAY)
             return True
         except Exception as e:
-            print(f"[SCD4X] Error initializing sensor with config: {e}")
+            if _DEBUG:
+                print("[SCD4X] Error initializing sensor with config: %s" % e)
             return False
\ No newline at end of file
@@ -0,0 +1,3 @@
+# secrets.py - WiFi credentials, kept out of config.py so it can be frozen
+WIFI_SSID = 'SSID'
+WIFI_PASSWORD = 'PWD'
\ No newline at end of file
@@ -1,8 +1,32 @@
 # sensor_manager.py - Manages sensors and readings with improved error handling
 import time
+import array
 import machine
 import config
-from utils import feed_watchdog, RetryWithBackoff, validate_sensor_reading
+from micropython import const
+from utils import feed_watchdog, RetryWithBackoff, ExponentialBackoff, validate_sensor_reading, celsius_to_fahrenheit
+from scd4x import SCD4X
+
+# The light sensor is optional, and so is its driver
+try:
+    from veml7700 import VEML7700
+except ImportError:
+    VEML7700 = None
+
+# Layout of the readings array returned by SensorManager.get_readings()
+READING_CO2 = const(0)
+READING_TEMP_C = const(1)
+READING_TEMP_F = const(2)
+READING_HUMIDITY = const(3)
+READING_PRESSURE = const(4)
+READING_LUX = const(5)
+READING_FIELDS = const(6)
+
+# Raw SCD4X access used during recovery
+_ADDR = const(0x62)          # SCD4X I2C address
+_CMD_REINIT = b'\x36\x46'    # SCD4X_REINIT command bytes
+
+_REINIT_COOLDOWN = const(30)  # Seconds between attempts to bring back a missing sensor
 
 class SensorManager:
     """Manages sensor initialization, readings, and error handling with robust recovery"""
@@ -25,16 +49,20 @@ class SensorManager:
         self.light_sensor_errors = 0
         self.light_sensor_consecutive_errors = 0
         self.last_light_reset_time = 0
-        self.last_good_reading = {
-            'co2': 800,  # Default typical indoor CO2 level
-            'temp_c': 20,
-            'temp_f': 68,
-            'humidity': 50,
-            'pressure': 1013,  # Default pressure value in hPa
-            'lux': 100.0  # Default light level
-        }
         self.last_successful_read = 0
         self.min_read_interval = 5  # Minimum seconds between readings
+        self._next_reinit_allowed = 0  # time.time() before which init isn't retried
+        
+        # Last good reading, indexed by the READING_* constants. Filled in
+        # place by get_readings() and returned from it.
+        self._readings = array.array('f', [0.0] * READING_FIELDS)
+        self._store_readings(
+            800,    # Default typical indoor CO2 level
+            20,
+            50,
+            1013,   # Default pressure value in hPa
+            100.0   # Default light level
+        )
         
         # Initialize sensors with retry logic
         self._initialize_sensor()
@@ -46,53 +74,32 @@ class SensorManager:
         Returns:
             bool: True if initialized successfully, False on error
         """
-        self.logger.log("SENSOR", "Initializing CO2 sensor...")
+        # Most init failures are transient (e.g. a power-on race), so retry
+        # quickly at first: roughly 0.1 s, 0.4 s, then 1.6 s between attempts
+        backoff = ExponentialBackoff(0.1, factor=4)
         
         # Try multiple initialization attempts
         for attempt in range(3):
             try:
-                from scd4x import SCD4X
-                
-                # Create sensor instance
-                self.scd4x = SCD4X(self.i2c)
-                
-                # Stop any ongoing measurements first
-                try:
-                    self.scd4x.stop_periodic_measurement()
-                    time.sleep(1)  # Allow time for command to complete
-                except Exception as e:
-                    self.logger.log("SENSOR", f"Error stopping measurements: {e}", "WARNING")
-                    # Continue anyway
-                
-                # Perform a soft reset for clean initialization
-                try:
-                    self._send_command(0x3646)  # SCD4X_REINIT command
-                    time.sleep(2)  # Allow device to reset
-                except Exception as e:
-                    self.logger.log("SENSOR", f"Error during soft reset: {e}", "WARNING")
-                
-                # Set ambient pressure for altitude compensation
-                try:
-                    self.scd4x.set_ambient_pressure(1013)
-                    time.sleep(0.1)  # Small delay after command
-                except Exception as e:
-                    self.logger.log("SENSOR", f"Error setting pressure: {e}", "WARNING")
+                # Create the sensor instance and configure it once here; the
+                # driver stops any running measurement, applies altitude,
+                # pressure and temperature offset, then starts measuring
+                self.scd4x = SCD4X(self.i2c, auto_init=False)
+                if not self.scd4x.configure():
+                    raise Exception("Sensor configuration failed")
                 
-                # Start periodic measurement
-                self.scd4x.start_periodic_measurement()
+                # Wait for the first measurement, up to 10 seconds; it is
+                # usually ready after about 5
+                if not self._wait_data_ready(10000):
+                    raise Exception("Sensor data not ready - Check connections")
                 
-                # Allow time for first measurement with timeout protection
-                print("[Sensor] Waiting for sensor to be ready...")
-                for wait_count in range(10):  # Max 10 seconds
-                    time.sleep(1)
-                    if wait_count % 2 == 0:  # Print every 2 seconds
-                        print(f"[Sensor] Still waiting... ({wait_count + 1}/10)")
-                
-                # Test reading to ensure everything is working
-                print("[Sensor] Testing sensor readings...")
-                if self._test_sensor_reading():
-                    self.logger.log("SENSOR", "CO2 sensor initialized successfully", "INFO")
-                    print("[Sensor] ✓ Sensor is working!")
+                # Test reading to ensure everything is working; on success
+                # report it with a single log entry and console line
+                values = self._test_sensor_reading()
+                if values:
+                    status = "CO2=%d, Temp=%.1f°C, Humidity=%.1f%%" % values
+                    self.logger.log("SENSOR", "CO2 sensor initialized: " + status, "INFO")
+                    print("[Sensor] ✓ Sensor OK: " + status)
                     self.consecutive_errors = 0
                     return True
                 else:
@@ -103,7 +110,7 @@ class SensorManager:
                 
                 # Clean up before retry
                 self.scd4x = None
-                time.sleep(2)  # Wait before retrying
+                time.sleep(backoff.get_delay())  # Wait before retrying
                 
                 # Try to reset I2C bus if this isn't the first attempt
                 if attempt > 0:
@@ -120,34 +127,46 @@ class SensorManager:
         Returns:
             bool: True if initialized successfully, False on error
         """
-        self.logger.log("SENSOR", "Initializing light sensor...")
-        
-        try:
-            from veml7700 import VEML7700
-            
-            # Create light sensor instance
-            self.veml7700 = VEML7700(self.i2c)
-            
-            # Test if sensor is responding
-            if self.veml7700.is_available():
-                self.light_sensor_available = True
-                self.logger.log("SENSOR", "VEML7700 light sensor initialized successfully", "INFO")
-                print("[Sensor] ✓ Light sensor is working!")
-                return True
-            else:
-                raise Exception("Light sensor not responding")
-                
-        except Exception as e:
-            self.logger.log("SENSOR", f"Light sensor initialization failed: {str(e)}", "WARNING")
+        if VEML7700 is None:
+            self.logger.log("SENSOR", "Light sensor initialization failed: veml7700 driver not installed", "WARNING")
             print("[Sensor] ⚠ Light sensor not available (optional)")
-            self.veml7700 = None
             self.light_sensor_available = False
             return False
+        
+        # Two attempts, 0.1 s apart, to ride out a sensor that is still
+        # powering up
+        backoff = ExponentialBackoff(0.1, factor=4)
+        
+        for attempt in range(2):
+            try:
+                # Create light sensor instance
+                self.veml7700 = VEML7700(self.i2c)
+                
+                # Test if sensor is responding
+                if self.veml7700.is_available():
+                    self.light_sensor_available = True
+                    self.logger.log("SENSOR", "VEML7700 light sensor initialized successfully", "INFO")
+                    print("[Sensor] ✓ Light sensor is working!")
+                    return True
+                else:
+                    raise Exception("Light sensor not responding")
+                    
+            except Exception as e:
+                self.logger.log("SENSOR", f"Light sensor initialization attempt {attempt+1} failed: {str(e)}", "WARNING")
+                self.veml7700 = None
+                if attempt == 0:
+                    time.sleep(backoff.get_delay())
+        
+        print("[Sensor] ⚠ Light sensor not available (optional)")
+        self.light_sensor_available = False
+        return False
     
-    def _reset_light_sensor(self):
-        """Reset light sensor when errors occur"""
-        current_time = time.time()
+    def _reset_light_sensor(self, current_time):
+        """Reset light sensor when errors occur
         
+        Args:
+            current_time: time.time() as already read by the caller
+        """
         # Prevent too frequent reset attempts
         if current_time - self.last_light_reset_time < config.VEML7700_RESET_DELAY:
             return False
@@ -174,57 +193,130 @@ class SensorManager:
         """Send a raw command to the sensor
         
         Args:
-            cmd: Command code
+            cmd: Command as 2 bytes, e.g. _CMD_REINIT
             cmd_delay: Optional delay after sending
         """
-        cmd_bytes = bytearray(2)
-        cmd_bytes[0] = (cmd >> 8) & 0xFF
-        cmd_bytes[1] = cmd & 0xFF
-        self.i2c.writeto(0x62, cmd_bytes)  # Hard-coded address for simplicity
-        time.sleep(0.01)  # Small delay after every command
+        self.i2c.writeto(_ADDR, cmd)
+        time.sleep_ms(10)  # Small delay after every command
         if cmd_delay > 0:
             time.sleep(cmd_delay)
     
+    def _wait_data_ready(self, timeout_ms):
+        """Poll the CO2 sensor until a measurement is ready
+        
+        Probes every 50 ms against a ticks_ms() deadline and feeds the
+        watchdog between probes.
+        
+        Args:
+            timeout_ms: Longest time to wait
+            
+        Returns:
+            bool: True if data is ready, False on timeout
+        """
+        end = time.ticks_add(time.ticks_ms(), timeout_ms)
+        while time.ticks_diff(end, time.ticks_ms()) > 0:
+            if self.scd4x.data_ready:
+                return True
+            time.sleep_ms(50)
+            feed_watchdog()
+        return False
+    
     def _test_sensor_reading(self):
-        """Test sensor with timeout protection for middle schoolers"""
+        """Test sensor with timeout protection for middle schoolers
+        
+        Called once _initialize_sensor() has seen data_ready, so this reads
+        straight away without asking the sensor again. Only failures are
+        printed; the caller reports a good reading.
+        
+        Returns:
+            tuple: (co2, temp, humidity) if the readings look right, else None
+        """
         try:
-            # Wait for data with clear feedback
-            print("[Sensor] Checking if data is ready...")
-            for wait_attempt in range(6):  # Max 3 seconds
-                if self.scd4x.data_ready:
-                    print("[Sensor] Data is ready!")
-                    break
-                time.sleep(0.5)
-                if wait_attempt % 2 == 1:  # Print every second
-                    print(f"[Sensor] Waiting for data... ({wait_attempt + 1}/6)")
-            else:
-                print("[Sensor] ✗ Sensor data not ready - check wiring")
-                return False
-            
-            # Try to read with feedback
-            print("[Sensor] Reading sensor values...")
-            co2 = self.scd4x.CO2
-            temp = self.scd4x.temperature
-            humid = self.scd4x.relative_humidity
-            
-            print(f"[Sensor] Got readings: CO2={co2}, Temp={temp:.1f}°C, Humidity={humid:.1f}%")
+            values = self.scd4x.read_all(check_ready=False)
+            co2, temp, humid = values
             
             # Check for reasonable values
             if 300 <= co2 <= 5000 and -10 <= temp <= 60 and 0 <= humid <= 100:
-                print("[Sensor] ✓ All readings look good!")
-                return True
+                return values
             else:
-                print(f"[Sensor] ✗ Readings seem wrong - CO2 should be 300-5000, got {co2}")
-                return False
+                print(f"[Sensor] ✗ Readings seem wrong - CO2 should be 300-5000, got {co2}, Temp={temp:.1f}°C, Humidity={humid:.1f}%")
+                return None
             
         except Exception as e:
             print(f"[Sensor] ✗ Error reading sensor: {e}")
             self.logger.log("SENSOR", f"Sensor test failed: {e}", "WARNING")
+            return None
+    
+    def _new_i2c(self):
+        """Create the I2C bus with default config values"""
+        return machine.I2C(
+            1, 
+            scl=machine.Pin(config.I2C_SCL_PIN), 
+            sda=machine.Pin(config.I2C_SDA_PIN), 
+            freq=config.I2C_FREQUENCY
+        )
+    
+    def _sensor_present(self):
+        """Check whether the CO2 sensor ACKs its address
+        
+        A single empty write to the sensor, rather than a scan() that probes
+        every address on the bus.
+        
+        Returns:
+            bool: True if the sensor answered
+        """
+        try:
+            self.i2c.writeto(_ADDR, b'')
+            return True
+        except OSError:
+            return False
+    
+    def _i2c_soft_recover(self):
+        """Free a bus held by a stuck device without a full reset
+        
+        Toggles SCL nine times so a device halfway through a byte can finish
+        it and release SDA, sends a STOP condition, then hands the pins back
+        to the I2C peripheral.
+        
+        Returns:
+            bool: True if the CO2 sensor answers afterwards
+        """
+        try:
+            scl = machine.Pin(config.I2C_SCL_PIN, machine.Pin.OPEN_DRAIN, value=1)
+            sda = machine.Pin(config.I2C_SDA_PIN, machine.Pin.OPEN_DRAIN, value=1)
+            for _ in range(9):
+                scl.value(0)
+                time.sleep_us(5)
+                scl.value(1)
+                time.sleep_us(5)
+            
+            # STOP: SDA rises while SCL is high
+            scl.value(0)
+            sda.value(0)
+            time.sleep_us(5)
+            scl.value(1)
+            time.sleep_us(5)
+            sda.value(1)
+            time.sleep_us(5)
+            
+            self.i2c = self._new_i2c()
+            return self._sensor_present()
+        except Exception as e:
+            self.logger.log("SENSOR", f"I2C soft recovery failed: {e}", "WARNING")
             return False
     
     def _reset_i2c_bus(self):
-        """Simplified I2C bus reset"""
+        """Simplified I2C bus reset
+        
+        Tries the quick soft recovery first and only deinitializes and
+        recreates the bus, with its settling delays, if the sensor is still
+        missing afterwards.
+        """
         self.logger.log("SENSOR", "Resetting I2C bus", "WARNING")
+        if self._i2c_soft_recover():
+            self.logger.log("SENSOR", "I2C soft recovery successful", "INFO")
+            return
+        
         try:
             # Deinitialize current I2C
             try:
@@ -235,18 +327,12 @@ class SensorManager:
             time.sleep(2)  # Longer delay for stability
             
             # Recreate I2C with default config values
-            self.i2c = machine.I2C(
-                1, 
-                scl=machine.Pin(config.I2C_SCL_PIN), 
-                sda=machine.Pin(config.I2C_SDA_PIN), 
-                freq=config.I2C_FREQUENCY
-            )
+            self.i2c = self._new_i2c()
             
             time.sleep(1)
             
             # Test if reset worked
-            devices = self.i2c.scan()
-            if 0x62 in devices:  # SCD4X address
+            if self._sensor_present():
                 self.logger.log("SENSOR", "I2C reset successful", "INFO")
             else:
                 self.logger.log("SENSOR", "I2C reset - sensor not found", "WARNING")
@@ -263,11 +349,12 @@ class SensorManager:
         """
         self.logger.log("SENSOR", "Attempting sensor reset", "WARNING")
         try:
-            # Stop measurement if sensor is active
+            # Stop measurement if sensor is active, then reload its settings
+            # from EEPROM before the bus is reset
             if self.scd4x:
                 try:
                     self.scd4x.stop_periodic_measurement()
-                    time.sleep(1)
+                    self._send_command(_CMD_REINIT, 0.02)
                 except:
                     pass
             
@@ -281,54 +368,71 @@ class SensorManager:
             self.logger.log("SENSOR", "Sensor reset failed", "ERROR", str(e))
             return False
     
+    def _store_readings(self, co2, temp_c, humidity, pressure, lux):
+        """Copy a set of readings into the shared readings array
+        
+        The Fahrenheit temperature is derived from temp_c with
+        utils.celsius_to_fahrenheit(), as for logged history.
+        """
+        r = self._readings
+        r[READING_CO2] = co2
+        r[READING_TEMP_C] = temp_c
+        r[READING_TEMP_F] = celsius_to_fahrenheit(temp_c)
+        r[READING_HUMIDITY] = humidity
+        r[READING_PRESSURE] = pressure
+        r[READING_LUX] = lux
+    
     def get_readings(self):
         """Get sensor readings with robust error handling and recovery
         
+        The same array is refilled on every successful read, so callers must
+        copy any values they need to keep. It always holds the last good
+        reading, which is what is returned when a fresh read isn't possible.
+        
         Returns:
-            tuple: (co2, temp_c, temp_f, humidity, pressure, lux) or None on critical failure
+            array: Floats indexed by the READING_* constants
+                (co2, temp_c, temp_f, humidity, pressure, lux), or None on
+                critical failure
         """
-        feed_watchdog()
-        
-        # Check minimum interval between reads to avoid overwhelming the sensor
+        # Check minimum interval between reads to avoid overwhelming the sensor.
+        # Most calls land here, so return the cached array before doing any
+        # other work.
         current_time = time.time()
-        time_since_last = current_time - self.last_successful_read
+        if (self.last_successful_read > 0 and
+                current_time - self.last_successful_read < self.min_read_interval):
+            return self._readings
         
-        if time_since_last < self.min_read_interval and self.last_successful_read > 0:
-            # Too soon since last successful read, return last good reading
-            return (
-                self.last_good_reading['co2'],
-                self.last_good_reading['temp_c'],
-                self.last_good_reading['temp_f'],
-                self.last_good_reading['humidity'],
-                self.last_good_reading['pressure'],
-                self.last_good_reading['lux']
-            )
+        feed_watchdog()
         
         # Simplified reading with basic retry
         for attempt in range(2):  # Reduced attempts
             try:
-                # Check if sensor is initialized
+                # Check if sensor is initialized. A failed init takes several
+                # seconds, so while in cooldown skip it and return the last
+                # good reading straight away.
                 if not self.scd4x:
+                    if current_time < self._next_reinit_allowed:
+                        return self._readings
                     if not self._initialize_sensor():
+                        self._next_reinit_allowed = time.time() + _REINIT_COOLDOWN
                         raise RuntimeError("Sensor not initialized")
                 
-                # Wait for data to be ready (simplified)
-                for _ in range(6):  # Reduced wait time
-                    if self.scd4x.data_ready:
-                        break
-                    time.sleep(0.5)
-                else:
+                # Wait up to 3 s for data to be ready, then read all three
+                # values in one transaction. The wait already saw data_ready,
+                # so sample() skips sending another get_data_ready command.
+                scd4x = self.scd4x
+                if not self._wait_data_ready(3000):
                     raise RuntimeError("Sensor data not ready")
+                scd4x.sample(check_ready=False)
 
-                # Get readings from sensor
-                co2 = self.scd4x.CO2
-                temp_c = self.scd4x.temperature
-                temp_f = (temp_c * 9/5) + 32
-                humidity = self.scd4x.relative_humidity
-                pressure = self.last_good_reading['pressure']
+                # Get readings from sensor; sample() cached them
+                co2 = scd4x.CO2
+                temp_c = scd4x.temperature
+                humidity = scd4x.relative_humidity
+                pressure = self._readings[READING_PRESSURE]
                 
                 # Get light reading if available with enhanced error handling
-                lux = self.last_good_reading['lux']  # Default to last good reading
+                lux = self._readings[READING_LUX]  # Default to last good reading
                 if self.light_sensor_available and self.veml7700:
                     try:
                         # Use retry mechanism from enhanced driver
@@ -346,7 +450,7 @@ class SensorManager:
                             # Check if we need to reset the sensor
                             if self.light_sensor_consecutive_errors >= config.VEML7700_MAX_ERRORS:
                                 self.logger.log("SENSOR", f"Light sensor has {self.light_sensor_consecutive_errors} consecutive errors, attempting reset", "WARNING")
-                                if self._reset_light_sensor():
+                                if self._reset_light_sensor(current_time):
                                     # Try reading again after reset
                                     try:
                                         reset_result = self.veml7700.get_readings_with_retry(1)
@@ -371,18 +475,15 @@ class SensorManager:
                 # Validate light reading if available
                 if lux is not None and not validate_sensor_reading(lux, 'light'):
                     self.logger.log("SENSOR", f"Invalid light reading: {lux} lux", "WARNING")
-                    lux = self.last_good_reading['lux']  # Use last good reading
+                    lux = self._readings[READING_LUX]  # Use last good reading
 
                 # Success - reset error counter and update readings
                 self.consecutive_errors = 0
                 self.last_successful_read = current_time
                 
-                self.last_good_reading.update({
-                    'co2': co2, 'temp_c': temp_c, 'temp_f': temp_f,
-                    'humidity': humidity, 'pressure': pressure, 'lux': lux
-                })
+                self._store_readings(co2, temp_c, humidity, pressure, lux)
                 
-                return co2, temp_c, temp_f, humidity, pressure, lux
+                return self._readings
 
             except Exception as e:
                 self.consecutive_errors += 1
@@ -396,14 +497,7 @@ class SensorManager:
             self.reset_sensor()
 
         # Return last good reading
-        return (
-            self.last_good_reading['co2'],
-            self.last_good_reading['temp_c'],
-            self.last_good_reading['temp_f'],
-            self.last_good_reading['humidity'],
-            self.last_good_reading['pressure'],
-            self.last_good_reading['lux']
-        )
+        return self._readings
 
     def clear_caches(self):
         """Clear any caches to free memory"""
@@ -419,7 +513,7 @@ class SensorManager:
         return {
             'initialized': self.scd4x is not None,
             'consecutive_errors': self.consecutive_errors,
-            'last_reading': self.last_good_reading,
+            'last_reading': self._readings,  # Indexed by READING_*
             'last_success': self.last_successful_read,
             'light_sensor_available': self.light_sensor_available,
             'light_sensor_errors': self.light_sensor_errors,
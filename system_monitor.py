@@ -2,22 +2,32 @@
 import gc
 import os
 import time
-from utils import feed_watchdog
+import array
+import config
+from micropython import const
+from utils import feed_watchdog, format_uptime
 
-def format_uptime(seconds):
-    try:
-        if seconds < 0: return "0m 0s"
-        days, remainder = divmod(seconds, 86400)
-        hours, remainder = divmod(remainder, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        if days > 0:
-            return f"{int(days)}d {int(hours)}h"
-        elif hours > 0:
-            return f"{int(hours)}h {int(minutes)}m"
-        else:
-            return f"{int(minutes)}m {int(seconds)}s"
-    except:
-        return "Error"
+# Layout of the health stats array returned by check_system_health().
+# Uptime is kept out of it as an int, see SystemMonitor.uptime.
+HEALTH_MEMORY_PERCENT = const(0)
+HEALTH_MEMORY_USED = const(1)
+HEALTH_STORAGE_PERCENT = const(2)
+HEALTH_FIELDS = const(3)
+
+_SEC_PER_HOUR = const(3600)
+_STORAGE_TTL = const(60)  # Seconds a statvfs() result is reused for
+_GC_PERCENT = const(90)   # Heap usage above which a health check collects first
+
+# Logging thresholds, in percent, copied from config once at import
+_MEM_WARN = config.MEMORY_WARNING_THRESHOLD
+_MEM_CRIT = config.MEMORY_CRITICAL_THRESHOLD
+_STORAGE_CRIT = config.STORAGE_CRITICAL_THRESHOLD
+
+# RP2040 temperature sensor: 0.706 V at 27 °C, falling 1.721 mV per °C.
+# Floats can't be const(), so these stay module globals.
+_ADC_TO_VOLTS = 3.3 / 65535  # read_u16() counts to volts
+_TEMP_V27 = 0.706
+_TEMP_SLOPE = 0.001721
 
 class SystemMonitor:
     def __init__(self, logger):
@@ -25,20 +35,83 @@ class SystemMonitor:
         self.start_time = time.time()
         self.total_measurements = 0
         self.failed_measurements = 0
-        self.health_stats = {
-            'uptime': 0,
-            'memory_percent': 0,
-            'memory_used': 0,
-            'storage_percent': 0,
-            'cpu_temp': 0,
-            'device_model': 'Unknown'
-        }
+        # Filled in place by check_system_health(), indexed by HEALTH_*
+        self.health_stats = array.array('f', [0.0] * HEALTH_FIELDS)
+        self.device_model = self.get_device_model()  # Fixed for the board
+        # Storage usage only changes when files are written, so statvfs() is
+        # cached and refreshed after _STORAGE_TTL or invalidate_storage()
+        self._storage_percent = 0
+        self._storage_ts = None
+        # Last string from uptime_str(), and the uptime it was built for
+        self._uptime_key = -1
+        self._uptime_str = ""
+        # On-chip temperature sensor, created once; None if unavailable
+        try:
+            import machine
+            self._adc_temp = machine.ADC(4)
+        except Exception:
+            self._adc_temp = None
         self.check_system_health()
     
     def record_error(self, component_name="Unknown"):
         """Record a system error"""
         self.failed_measurements += 1
 
+    @property
+    def uptime(self):
+        """Whole seconds since the monitor was created"""
+        return int(time.time() - self.start_time)
+
+    def uptime_str(self, seconds):
+        """Format uptime, reusing the last string while it would read the same
+        
+        Past the first hour only minutes are shown, so the string is rebuilt
+        at most once a minute.
+        
+        Args:
+            seconds: Uptime in seconds, e.g. from the uptime property
+            
+        Returns:
+            str: Uptime as formatted by utils.format_uptime()
+        """
+        s = int(seconds) if seconds > 0 else 0
+        key = s if s < _SEC_PER_HOUR else s - s % 60
+        if key != self._uptime_key:
+            self._uptime_key = key
+            self._uptime_str = format_uptime(s)
+        return self._uptime_str
+    
+    def invalidate_storage(self):
+        """Make the next health check re-read storage usage
+        
+        Called by components after they write or delete files.
+        """
+        self._storage_ts = None
+    
+    def get_storage_percent(self):
+        """Get filesystem usage, calling statvfs() at most every _STORAGE_TTL seconds
+        
+        Returns:
+            float: Percent of the filesystem in use, 0 if unavailable
+        """
+        now = time.time()
+        if self._storage_ts is not None and now - self._storage_ts < _STORAGE_TTL:
+            return self._storage_percent
+        
+        try:
+            s = os.statvfs('/')
+            # Block size cancels out of the ratio, so only block counts are used
+            storage_percent = ((s[2] - s[3]) / s[2]) * 100
+            
+            if storage_percent > _STORAGE_CRIT:
+                self.logger.log("STORAGE", f"Critical storage: {storage_percent:.1f}%", "WARNING")
+        except:
+            storage_percent = 0
+        
+        self._storage_percent = storage_percent
+        self._storage_ts = now
+        return storage_percent
+
     def get_device_model(self):
         """Gets the board model name from os.uname()."""
         try:
@@ -52,50 +125,50 @@ class SystemMonitor:
 
     def get_cpu_temperature(self):
         """Get CPU temperature if available"""
+        if self._adc_temp is None:
+            return 0
         try:
-            import machine
-            sensor_temp = machine.ADC(4)
-            conversion_factor = 3.3 / 65535
-            reading = sensor_temp.read_u16() * conversion_factor
-            return 27 - (reading - 0.706) / 0.001721
-        except:
+            reading = self._adc_temp.read_u16() * _ADC_TO_VOLTS
+            return 27 - (reading - _TEMP_V27) / _TEMP_SLOPE
+        except Exception:
             return 0
 
     def check_system_health(self):
-        """System health check with basic monitoring"""
+        """System health check with basic monitoring
+        
+        The same array is refilled on every check, so callers must copy any
+        values they need to keep.
+        
+        Returns:
+            array: Floats indexed by the HEALTH_* constants (memory_percent,
+                memory_used, storage_percent)
+        """
         feed_watchdog()
         try:
-            gc.collect()
+            # Routine collections are left to the VM's gc.threshold(), so
+            # the figures include some garbage. Only collect, and re-read,
+            # when the heap looks nearly full.
             mem_free, mem_alloc = gc.mem_free(), gc.mem_alloc()
             mem_total = mem_free + mem_alloc
             mem_percent = (mem_alloc / mem_total) * 100 if mem_total > 0 else 0
+            if mem_percent > _GC_PERCENT:
+                gc.collect()
+                mem_alloc = gc.mem_alloc()
+                mem_percent = (mem_alloc / mem_total) * 100
             
             # Log memory warnings
-            if mem_percent > 85:
+            if mem_percent > _MEM_CRIT:
                 self.logger.log("MEMORY", f"Critical memory usage: {mem_percent:.1f}%", "WARNING")
-            elif mem_percent > 75:
+            elif mem_percent > _MEM_WARN:
                 self.logger.log("MEMORY", f"High memory usage: {mem_percent:.1f}%", "INFO")
             
-            # Simplified storage check
-            try:
-                s = os.statvfs('/')
-                storage_total = s[0] * s[2]
-                storage_free = s[0] * s[3]
-                storage_percent = ((storage_total - storage_free) / storage_total) * 100
-                
-                if storage_percent > 90:
-                    self.logger.log("STORAGE", f"Critical storage: {storage_percent:.1f}%", "WARNING")
-            except:
-                storage_percent = 0
+            storage_percent = self.get_storage_percent()
 
-            self.health_stats.update({
-                'uptime': time.time() - self.start_time,
-                'memory_percent': mem_percent,
-                'memory_used': mem_alloc,
-                'storage_percent': storage_percent,
-                'device_model': self.get_device_model()
-            })
-            return self.health_stats
+            hs = self.health_stats
+            hs[HEALTH_MEMORY_PERCENT] = mem_percent
+            hs[HEALTH_MEMORY_USED] = mem_alloc
+            hs[HEALTH_STORAGE_PERCENT] = storage_percent
+            return hs
         except Exception as e:
             self.logger.log("SYSTEM", f"Health check error: {e}", "ERROR")
             return self.health_stats
\ No newline at end of file
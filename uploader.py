@@ -1,59 +1,101 @@
 # uploader.py - Updated with rounding for temperature and humidity
 import urequests
+import errno
 import json
 import network
 import config
+from micropython import const
 
-def upload_data_to_server(sensor_data):
-    """Upload sensor data to server with minimal overhead"""
+# Fields read from a record in the upload buffer (array of floats). These
+# match the READING_* layout of SensorManager.get_readings(), so the readings
+# array can be uploaded as-is.
+UPLOAD_CO2 = const(0)
+UPLOAD_TEMP_C = const(1)
+UPLOAD_HUMIDITY = const(3)
+UPLOAD_PRESSURE = const(4)
+UPLOAD_LUX = const(5)
+UPLOAD_FIELDS = const(6)
+
+# Request headers, shared by every upload
+_HEADERS = {'Content-Type': 'application/json'}
+
+# Station interface, looked up once rather than on every upload
+_wlan = network.WLAN(network.STA_IF)
+
+# JSON body with the device ID and software date already filled in, leaving
+# %-placeholders for the readings. Built on the first upload, since the
+# device ID is only read from the hardware on first use.
+_payload_template = None
+
+def _get_payload_template():
+    """Get the upload body template, building it on first use
+    
+    Returns:
+        str: Template taking (temp_c, humidity, co2, pressure_pa, lux)
+    """
+    global _payload_template
+    if _payload_template is None:
+        _payload_template = (
+            '{"Temperature (C)": %s, "Humidity (%%)": %s, "CO2 (ppm)": %d, '
+            '"Pressure (Pa)": %s, "Light (lux)": %s, "ID": '
+            + json.dumps(config.get_device_id()) + ', "software_date": '
+            + json.dumps(config.SOFTWARE_DATE) + '}')
+    return _payload_template
+
+def upload_data_to_server(buf, base=0):
+    """Upload sensor data to server with minimal overhead
+    
+    Args:
+        buf: Readings array('f'), e.g. from SensorManager.get_readings()
+        base: Index of the record's first field in buf
+    """
     # Check network connection
-    wlan = network.WLAN(network.STA_IF)
-    if not wlan.isconnected():
+    if not _wlan.isconnected():
         return False
 
-    # Build simplified payload
-    payload = {
-        "Temperature (C)": round(sensor_data.get('temperature_c', 0), 1),
-        "Humidity (%)": round(sensor_data.get('humidity_percent', 0)),
-        "CO2 (ppm)": sensor_data.get('co2_ppm', 0),
-        "Pressure (Pa)": sensor_data.get('pressure_hpa', 0) * 100,
-        "Light (lux)": round(sensor_data.get('light_lux', 0), 1),
-        "ID": config.DEVICE_ID,
-        "software_date": config.SOFTWARE_DATE
-    }
-
     try:
-        headers = {'Content-Type': 'application/json'}
-        payload = json.dumps(payload)
-        response = urequests.post(config.UPLOAD_URL, data=payload, headers=headers)
+        # Fill the readings into the prebuilt JSON body and encode it once;
+        # the same bytes are sent and, when debugging, printed
+        body = (_get_payload_template() % (
+            round(buf[base + UPLOAD_TEMP_C], 1),
+            round(buf[base + UPLOAD_HUMIDITY]),
+            int(buf[base + UPLOAD_CO2]),
+            buf[base + UPLOAD_PRESSURE] * 100,
+            round(buf[base + UPLOAD_LUX], 1)
+        )).encode('utf-8')
+        response = urequests.post(config.UPLOAD_URL, data=body, headers=_HEADERS)
+        status = response.status_code
+        response.close()
         
-        if 200 <= response.status_code < 300:
+        if 200 <= status < 300:
             if config.UPLOAD_DEBUG_MODE:
                 print(f"[Upload] ✓ Upload successful")
-            response.close()
             return True
         else:
             if config.UPLOAD_DEBUG_MODE:
-                print(f"[Upload] ✗ Upload failed with status {response.status_code}")
-            response.close()
+                print("[Upload] ✗ Upload failed with status %d\n[Upload] Sent: %s"
+                      % (status, body.decode()))
             return False
         
     except Exception as e:
-        error_msg = str(e)
-        error_type = type(e).__name__
         if config.UPLOAD_DEBUG_MODE:
-            print(f"[Upload] Error Type: {error_type}")
-            print(f"[Upload] Error Message: {error_msg}")
-            print(f"[Upload] Error Args: {e.args}")
-            # Log more specific error types for debugging
-            if "ETIMEDOUT" in error_msg:
-                print(f"[Upload] Network timeout - check internet connection")
-            elif "ECONNRESET" in error_msg:
-                print(f"[Upload] Connection reset by server")
-            elif "EHOSTUNREACH" in error_msg:
-                print(f"[Upload] Host unreachable - check server URL")
-            elif "keyword" in error_msg:
-                print(f"[Upload] Function call error - check urequests parameters")
+            error_msg = str(e)
+            # Add a more specific hint for known errors; socket errors carry
+            # their errno as the first argument
+            code = e.args[0] if isinstance(e, OSError) and e.args else None
+            if code == errno.ETIMEDOUT:
+                hint = "\n[Upload] Network timeout - check internet connection"
+            elif code == errno.ECONNRESET:
+                hint = "\n[Upload] Connection reset by server"
+            elif code == errno.EHOSTUNREACH:
+                hint = "\n[Upload] Host unreachable - check server URL"
+            elif code is None and "keyword" in error_msg:
+                hint = "\n[Upload] Function call error - check urequests parameters"
+            else:
+                hint = ""
+            # One print, so the console is written once
+            print("[Upload] Error Type: %s\n[Upload] Error Message: %s\n[Upload] Error Args: %s%s"
+                  % (type(e).__name__, error_msg, e.args, hint))
         else:
-            print(f"[Upload] Error: {error_msg}")
+            print(f"[Upload] Error: {e}")
         return False
\ No newline at end of file
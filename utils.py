@@ -41,7 +41,7 @@ def sync_time_periodic(logger=None):
         
         # Adjust for timezone if configured
         if hasattr(config, 'TIMEZONE_OFFSET'):
-            timezone_offset = config.TIMEZONE_OFFSET * 3600
+            timezone_offset = int(config.TIMEZONE_OFFSET * 3600)  # May be fractional hours
             current_time = time.time() + timezone_offset
             tm = time.localtime(current_time)
             machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
@@ -91,19 +91,15 @@ def format_date(t):
 
 def format_uptime(seconds):
     """Convert seconds to a readable format (days, hours, minutes)"""
-    days = seconds // (24 * 3600)
-    seconds %= (24 * 3600)
-    hours = seconds // 3600
-    seconds %= 3600
-    minutes = seconds // 60
-    seconds %= 60
-
-    if days > 0:
-        return f"{int(days)}d {int(hours)}h {int(minutes)}m"
-    elif hours > 0:
-        return f"{int(hours)}h {int(minutes)}m"
-    else:
-        return f"{int(minutes)}m {int(seconds)}s"
+    s = int(seconds) if seconds > 0 else 0
+    days, s = divmod(s, 24 * 3600)
+    hours, s = divmod(s, 3600)
+    minutes, s = divmod(s, 60)
+    if days:
+        return "%dd %dh" % (days, hours)
+    if hours:
+        return "%dh %dm" % (hours, minutes)
+    return "%dm %ds" % (minutes, s)
 
 def get_wifi_status_explanation(status):
     """Return a human-readable explanation of a WiFi status code."""
@@ -136,6 +132,10 @@ def validate_sensor_reading(value, sensor_type):
     except Exception:
         return False
 
+def celsius_to_fahrenheit(temp_c):
+    """Convert a Celsius temperature to Fahrenheit"""
+    return temp_c * 1.8 + 32.0
+
 def format_sensor_value(value, decimals=1):
     """Format a sensor value with a fixed number of decimal places."""
     try:
@@ -172,14 +172,15 @@ def ensure_directory(directory):
 
 class ExponentialBackoff:
     """Implements exponential backoff for retry strategies."""
-    def __init__(self, base_delay, max_delay=60, jitter=0.1):
+    def __init__(self, base_delay, max_delay=60, jitter=0.1, factor=2):
         self.base_delay = base_delay
         self.max_delay = max_delay
         self.jitter = jitter
+        self.factor = factor
         self.attempt = 0
 
     def get_delay(self):
-        delay = min(self.base_delay * (2 ** self.attempt), self.max_delay)
+        delay = min(self.base_delay * (self.factor ** self.attempt), self.max_delay)
         if self.jitter > 0:
             jitter_amount = delay * self.jitter
             delay = delay + (jitter_amount * (2 * random.random() - 1))
@@ -271,11 +272,45 @@ class Logger:
         except Exception as e:
             print(f"Cleanup error: {e}")
 
+# Fixed parts of a NetworkLogger entry, encoded once and copied into its
+# buffer: "YYYY-MM-DD HH:MM:SS [SEVERITY] [EVENT] message | Error: error"
+_TIMESTAMP_TEMPLATE = b"0000-00-00 00:00:00"
+_SEVERITY_TAGS = {s: (" [%s] [" % s).encode('utf-8') for s in ("INFO", "WARNING", "ERROR", "CRITICAL")}
+_EVENT_END = b"] "
+_ERROR_SEP = b" | Error: "
+
+def _put(mv, i, data):
+    """Copy data into mv at i and return the index just past it"""
+    j = i + len(data)
+    mv[i:j] = data
+    return j
+
+def _put_digits(mv, i, value, width):
+    """Write value as width zero-padded ASCII digits at mv[i]"""
+    j = i + width - 1
+    while j >= i:
+        mv[j] = 48 + value % 10
+        value //= 10
+        j -= 1
+
 class NetworkLogger(Logger):
-    """Logger for network events."""
-    def __init__(self, log_path=f"{config.LOG_DIRECTORY}/{config.NETWORK_LOG_FILE}"):
+    """Logger for network events.
+
+    Entries are written straight into a preallocated buffer, the timestamp
+    digit by digit and the fixed separators from preencoded bytes, and sent
+    to flash in one go when it fills, on WARNING/ERROR/CRITICAL entries,
+    once the oldest buffered entry is older than max_pending_ms, or when
+    flush() is called, instead of opening the log file for every entry.
+    """
+    def __init__(self, log_path=f"{config.LOG_DIRECTORY}/{config.NETWORK_LOG_FILE}", buffer_size=1024,
+                 max_pending_ms=5000):
         super().__init__()
         self.log_path = log_path
+        self._buf = bytearray(buffer_size)
+        self._mv = memoryview(self._buf)
+        self._buf_len = 0
+        self._max_pending_ms = max_pending_ms
+        self._pending_since = 0  # ticks_ms of the oldest buffered entry
         self._ensure_log_file()
 
     def _ensure_log_file(self):
@@ -290,19 +325,79 @@ class NetworkLogger(Logger):
 
     def log(self, event_type, message, severity="INFO", error=None):
         try:
-            if self._check_rotation(self.log_path):
-                self._rotate_log(self.log_path)
-                self._ensure_log_file()
-            timestamp = format_datetime(time.localtime())
-            log_entry = f"{timestamp} [{severity}] [{event_type}] {message}"
-            if error:
-                log_entry += f" | Error: {error}"
-            with open(self.log_path, 'a') as f:
-                f.write(log_entry + '\n')
-            if severity in ["ERROR", "CRITICAL"]:
-                print(log_entry)
+            # Only the caller's strings need encoding; everything else is
+            # copied from preencoded bytes
+            tag = _SEVERITY_TAGS.get(severity) or (" [%s] [" % severity).encode('utf-8')
+            event = event_type.encode('utf-8')
+            text = str(message).encode('utf-8')
+            err = str(error).encode('utf-8') if error else None
+            n = 19 + len(tag) + len(event) + 2 + len(text) + 1
+            if err:
+                n += len(_ERROR_SEP) + len(err)
+            
+            if self._buf_len + n > len(self._buf):
+                self.flush()
+            if n > len(self._buf):
+                mv = memoryview(bytearray(n))  # Too big to buffer, written directly
+                start = 0
+            else:
+                if not self._buf_len:
+                    self._pending_since = time.ticks_ms()
+                mv = self._mv
+                start = self._buf_len
+            
+            t = time.localtime()
+            mv[start:start + 19] = _TIMESTAMP_TEMPLATE
+            _put_digits(mv, start, t[0], 4)
+            _put_digits(mv, start + 5, t[1], 2)
+            _put_digits(mv, start + 8, t[2], 2)
+            _put_digits(mv, start + 11, t[3], 2)
+            _put_digits(mv, start + 14, t[4], 2)
+            _put_digits(mv, start + 17, t[5], 2)
+            i = _put(mv, start + 19, tag)
+            i = _put(mv, i, event)
+            i = _put(mv, i, _EVENT_END)
+            i = _put(mv, i, text)
+            if err:
+                i = _put(mv, i, _ERROR_SEP)
+                i = _put(mv, i, err)
+            mv[i] = 10  # Newline
+            
+            if mv is not self._mv:
+                self._write(mv)
+            else:
+                self._buf_len = i + 1
+            if severity in ("WARNING", "ERROR", "CRITICAL"):
+                if severity != "WARNING":
+                    print(bytes(mv[start:i]).decode('utf-8'))
+                self.flush()
+            else:
+                self.flush_if_stale()
+        except Exception as e:
+            print(f"Logging error: {e}")
+
+    def flush(self):
+        """Write buffered entries to the log file."""
+        if not self._buf_len:
+            return
+        try:
+            self._write(self._mv[:self._buf_len])
         except Exception as e:
             print(f"Logging error: {e}")
+        finally:
+            self._buf_len = 0
+
+    def flush_if_stale(self):
+        """Flush if the oldest buffered entry has waited longer than max_pending_ms."""
+        if self._buf_len and time.ticks_diff(time.ticks_ms(), self._pending_since) >= self._max_pending_ms:
+            self.flush()
+
+    def _write(self, data):
+        if self._check_rotation(self.log_path):
+            self._rotate_log(self.log_path)
+            self._ensure_log_file()
+        with open(self.log_path, 'ab') as f:
+            f.write(data)
 
 class ErrorLogger(Logger):
     """Logger for system errors."""
@@ -390,12 +485,18 @@ class SecurityManager:
                             if current_time < expire_time}
 
 class RetryWithBackoff:
-    """Decorator for functions that need retry with exponential backoff."""
-    def __init__(self, max_retries=3, base_delay=1, max_delay=10, jitter=0.1):
+    """Decorator for functions that need retry with exponential backoff.
+    
+    Only exceptions matching `exceptions` are retried; anything else is
+    raised straight away.
+    """
+    def __init__(self, max_retries=3, base_delay=1, max_delay=10, jitter=0.1,
+                 exceptions=(Exception,)):
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
         self.jitter = jitter
+        self.exceptions = exceptions
 
     def __call__(self, func):
         def wrapper(*args, **kwargs):
@@ -404,7 +505,7 @@ class RetryWithBackoff:
             for attempt in range(self.max_retries + 1):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except self.exceptions as e:
                     last_exception = e
                     if attempt < self.max_retries:
                         delay = backoff.get_delay()
@@ -1,25 +1,19 @@
 # web_server.py - FINAL version with graceful timeout handling
 import network
 import socket
+import select
 import time
 from machine import Pin, unique_id
 import config
 import gc
 import os
 import json
-from web_template import send_chunked_html 
+import struct
 
-def format_uptime(seconds):
-    """Formats uptime in a human-readable string."""
-    try:
-        if seconds < 0: return "0m 0s"
-        days, remainder = divmod(seconds, 86400)
-        hours, remainder = divmod(remainder, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        if days > 0: return f"{int(days)}d {int(hours)}h"
-        elif hours > 0: return f"{int(hours)}h {int(minutes)}m"
-        else: return f"{int(minutes)}m {int(seconds)}s"
-    except: return "Error"
+# Linger on with a zero timeout makes close() send a RST, so refused clients
+# leave no TIME_WAIT state or buffers behind. Not every port exposes it.
+_SO_LINGER = getattr(socket, 'SO_LINGER', None)
+_LINGER_RST = struct.pack('ii', 1, 0)
 
 class WebServer:
     def __init__(self, monitor, sensor_manager, data_logger, logger):
@@ -28,37 +22,67 @@ class WebServer:
         self.data_logger = data_logger
         self.logger = logger
         self.socket = None
+        self.poller = select.poll()  # Listening socket is registered in initialize_server()
         self.wlan = None
         self.ip_address = None
         self.html_shell = None
+        self.html_headers = None
+        self.html_file = None
+        self._send_buf = bytearray(512)  # Reused when streaming files
         self.last_network_check = 0
         self.reconnect_attempts = 0
         self.last_reconnect_time = 0
 
     def set_html_shell(self, html):
-        self.html_shell = html
-        self.logger.log("SERVER", "Main HTML page has been cached.", "INFO")
+        # Encode once and precompute the headers with the Content-Length
+        body = html.encode('utf-8')
+        self.html_headers = ("HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: %d\r\nConnection: close\r\n\r\n" % len(body)).encode('utf-8')
+        
+        # Park the page in flash so it doesn't hold heap for the whole uptime
+        try:
+            with open(config.HTML_CACHE_FILE, 'wb') as f:
+                f.write(body)
+            self.html_file = config.HTML_CACHE_FILE
+            self.html_shell = None
+            self.logger.log("SERVER", "Main HTML page has been cached to flash.", "INFO")
+        except OSError as e:
+            self.html_file = None
+            self.html_shell = body
+            self.logger.log("SERVER", f"Caching HTML page in RAM, flash write failed: {e}", "WARNING")
+
+    def send_html_shell(self, client_socket):
+        """Send the main page, streaming it from flash when possible"""
+        client_socket.sendall(self.html_headers)
+        if self.html_file is None:
+            client_socket.sendall(self.html_shell)
+            return
+        buf = self._send_buf
+        mv = memoryview(buf)
+        with open(self.html_file, 'rb') as f:
+            while True:
+                n = f.readinto(buf)
+                if not n: break
+                client_socket.sendall(mv[:n])
 
     def handle_api_data(self, client_socket):
         # This function is fast and remains unchanged
         try:
             readings = self.sensor_manager.get_readings()
-            system_stats = self.monitor.check_system_health()
+            mem_percent, mem_used, storage_percent = self.monitor.check_system_health()
             sensor_status = self.sensor_manager.get_status()
-            model_name = os.uname().machine.split(' with')[0]
 
             if readings:
                 co2, temp_c, temp_f, humidity, pressure, lux = readings
                 data = {
-                    "temp_c": temp_c, "temp_f": temp_f, "co2": co2, "humidity": humidity, "pressure": pressure, "lux": lux,
-                    "uptime_str": format_uptime(system_stats.get('uptime', 0)),
-                    "memory_percent": system_stats.get('memory_percent', 0),
-                    "memory_used_kb": system_stats.get('memory_used', 0) / 1024,
-                    "storage_percent": system_stats.get('storage_percent', 0),
+                    "temp_c": temp_c, "temp_f": temp_f, "co2": int(co2), "humidity": humidity, "pressure": pressure, "lux": lux,
+                    "uptime_str": self.monitor.uptime_str(self.monitor.uptime),
+                    "memory_percent": mem_percent,
+                    "memory_used_kb": mem_used / 1024,
+                    "storage_percent": storage_percent,
                     "light_sensor_available": sensor_status.get('light_sensor_available', False),
                     "light_sensor_errors": sensor_status.get('light_sensor_errors', 0),
-                    "device_id": config.DEVICE_ID,
-                    "device_model": model_name
+                    "device_id": config.get_device_id(),
+                    "device_model": self.monitor.device_model
                 }
                 self.send_response(client_socket, json.dumps(data), content_type='application/json')
             else:
@@ -89,7 +113,7 @@ class WebServer:
             
             # Master routing logic
             if path == '/':
-                send_chunked_html(client_socket, self.html_shell)
+                self.send_html_shell(client_socket)
             elif path == '/api/history': 
                 self.stream_api_history(client_socket)
             elif path == '/api/data': 
@@ -198,6 +222,7 @@ class WebServer:
             self.socket.bind(('0.0.0.0', port))
             self.socket.listen(1)
             self.socket.setblocking(False)
+            self.poller.register(self.socket, select.POLLIN)
             self.logger.log("SERVER", f"Web server started on port {port}", "INFO")
             return True
         except Exception as e:
@@ -233,7 +258,16 @@ class WebServer:
                 client_socket.sendall("DateTime,Temperature_C,Temperature_F,CO2_PPM,Humidity,Pressure,Light_Lux\n".encode('utf-8'))
                 for entry in history:
                     lux_value = entry.get('lux', 0.0)  # Support old format without lux
-                    line = f"{entry['timestamp']},{entry['temp_c']},{entry['temp_f']},{entry['co2']},{entry['humidity']},{entry['pressure']},{lux_value}\n"
+                    # %-formatting and join are cheaper than an f-string on MicroPython
+                    line = ','.join((
+                        entry['timestamp'],
+                        '%.1f' % entry['temp_c'],
+                        '%.1f' % entry['temp_f'],
+                        '%d' % entry['co2'],
+                        '%.1f' % entry['humidity'],
+                        '%.1f' % entry['pressure'],
+                        '%.1f' % lux_value
+                    )) + '\n'
                     client_socket.sendall(line.encode('utf-8'))
             elif path == '/json':
                 # Reverted /json to use json.dumps, which is fine for a file download
@@ -245,6 +279,7 @@ class WebServer:
             elif path.startswith('/logs/'):
                 # ... (streaming for logs is correct and unchanged)
                 filename = path.lstrip('/')
+                self.logger.flush()  # Include entries still in the log buffer
                 try:
                     file_size = os.stat(filename)[6]
                     if file_size > (gc.mem_free() * 0.8):
@@ -324,6 +359,10 @@ class WebServer:
         """Recover from socket errors by reinitializing"""
         try:
             if self.socket:
+                try:
+                    self.poller.unregister(self.socket)
+                except Exception:
+                    pass
                 self.socket.close()
                 time.sleep(1)
             
@@ -332,6 +371,15 @@ class WebServer:
             self.logger.log("SERVER", f"Socket recovery failed: {e}", "ERROR")
             return False
     
+    def reject_client(self, client_socket):
+        """Drop a refused connection with a RST where the port supports it"""
+        if _SO_LINGER is not None:
+            try:
+                client_socket.setsockopt(socket.SOL_SOCKET, _SO_LINGER, _LINGER_RST)
+            except OSError:
+                pass
+        client_socket.close()
+
     def shutdown(self):
         if self.socket:
             self.socket.close()
@@ -355,10 +403,15 @@ class WebServer:
             self.send_response(client_socket, "<h1>Error</h1>", status_code=500)
 
     def handle_sensors_page(self, client_socket):
-        """Handle the sensors status page"""
+        """Handle the sensors status page, sending it as it is generated"""
         try:
-            from sensors_page import create_sensors_page
-            sensors_html = create_sensors_page(self.sensor_manager, self.monitor)
-            self.send_response(client_socket, sensors_html)
+            from sensors_page import stream_sensors_page
         except Exception as e:
             self.send_response(client_socket, f"<h1>Error loading sensors page: {e}</h1>", status_code=500)
+            return
+        try:
+            client_socket.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\n\r\n")
+            for part in stream_sensors_page(self.sensor_manager, self.monitor):
+                client_socket.sendall(part.encode('utf-8'))
+        except Exception as e:
+            self.logger.log("SERVER", f"Error sending sensors page: {e}", "ERROR")
@@ -4,14 +4,7 @@ import sys
 import config
 import gc
 import time
-
-def format_uptime(seconds):
-    days = seconds // (24 * 3600); seconds %= (24 * 3600)
-    hours = seconds // 3600; seconds %= 3600
-    minutes = seconds // 60
-    if days > 0: return f"{int(days)}d {int(hours)}h"
-    elif hours > 0: return f"{int(hours)}h {int(minutes)}m"
-    else: return f"{int(minutes)}m {int(seconds // 1)}s"
+from utils import format_uptime
 
 HTML_HEADER = """<!DOCTYPE html><html><head><title>Environmental Monitor v{version}</title><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1"><script src="https://cdn.jsdelivr.net/npm/apexcharts"></script><style>body{{font-family:Arial,sans-serif;background:#f0f8ff;margin:0;padding:0}}#main-container{{max-width:800px;margin:20px auto;background:#fff;padding:20px;box-shadow:0 0 10px rgba(0,0,0,.1);border-radius:8px}}h1,h2{{text-align:center;color:#2c3e50}}.readings-grid{{display:grid;grid-template-columns:repeat(auto-fit,minmax(150px,1fr));gap:15px;margin-bottom:20px}}.reading-card{{background:#f8f9fa;padding:15px;border-radius:8px;text-align:center;border:1px solid #e9ecef}}.label{{font-size:.9em;color:#6c757d}}.value{{font-size:1.8em;font-weight:700;margin:5px 0}}.status{{font-size:.8em}}.toggle-btn{{font-size:.7em;padding:3px 8px;margin-top:5px;cursor:pointer;border:1px solid #007bff;background-color:#007bff;color:#fff;border-radius:12px}}.chart-container{{padding:10px;background:#fff;border:1px solid #ccc;border-radius:5px;margin-bottom:20px}}.system-grid{{display:grid;grid-template-columns:repeat(auto-fit,minmax(240px,1fr));gap:15px}}.system-card{{background:#f8f9fa;border-radius:8px;padding:15px}}.system-card h3{{margin:0 0 10px;font-size:1rem;color:#2c3e50}}.progress-bar{{width:100%;height:8px;background:#ecf0f1;border-radius:4px;overflow:hidden;margin:10px 0}}.progress{{height:100%;transition:width .3s ease}}.system-details{{display:flex;justify-content:space-between;font-size:.8rem;color:#666;margin-top:8px}}.footer{{text-align:center;margin-top:20px;font-size:.9em;color:#7f8c8d}}</style></head><body><div id="main-container">"""
 HTML_TITLE = "<h1>Environmental Monitor v{version}</h1>"
@@ -168,13 +161,4 @@ def create_html(config_obj):
             light_bright=config_obj.LIGHT_BRIGHT
         )
     ]
-    return ''.join(html_parts)
-
-def send_chunked_html(client_socket, html_content):
-    try:
-        headers = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\n\r\n"
-        client_socket.sendall(headers + html_content.encode())
-    except Exception as e:
-        print(f"Error in send_chunked_html: {e}")
-    finally:
-        client_socket.close()
\ No newline at end of file
+    return ''.join(html_parts)
\ No newline at end of file